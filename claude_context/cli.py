@@ -3,43 +3,81 @@
 CLI interface for Claude Context Box
 """
 
+import os
 import sys
 import json
 import argparse
 import subprocess
+from functools import lru_cache
 from pathlib import Path
-from .installer import ClaudeContextInstaller
+
+@lru_cache(maxsize=None)
+def _load_venv_info(path_str, mtime_ns):
+    """Parse venv_info.json once per (path, mtime) pair"""
+    with open(path_str, 'r') as f:
+        return json.load(f)
 
 def get_python_executable(target_dir):
     """Get Python executable from venv_info.json or detect automatically"""
-    venv_info_file = target_dir / '.claude' / 'venv_info.json'
-    
-    # Try to read saved venv info first
-    if venv_info_file.exists():
-        try:
-            with open(venv_info_file, 'r') as f:
-                venv_info = json.load(f)
-                python_path = Path(venv_info['python'])
-                if python_path.exists():
-                    return str(python_path)
-        except:
-            pass
-    
-    # Auto-detect virtual environment
-    venv_candidates = [
-        target_dir / '.venv' / 'bin' / 'python3',      # Poetry/modern style
-        target_dir / '.venv' / 'Scripts' / 'python.exe', # Poetry Windows
-        target_dir / 'venv' / 'bin' / 'python3',       # Standard style
-        target_dir / 'venv' / 'Scripts' / 'python.exe'  # Standard Windows
-    ]
-    
-    for candidate in venv_candidates:
-        if candidate.exists():
+    claude_dir = target_dir / '.claude'
+    
+    # Fast path: plain text sidecar written by the installer
+    try:
+        python_path = (claude_dir / 'python_path').read_text().strip()
+        if python_path and os.path.exists(python_path):
+            return python_path
+    except OSError:
+        pass
+    
+    # Try to read saved venv info
+    venv_info_file = claude_dir / 'venv_info.json'
+    try:
+        mtime_ns = os.stat(venv_info_file).st_mtime_ns
+        venv_info = _load_venv_info(str(venv_info_file), mtime_ns)
+        python_path = Path(venv_info['python'])
+        if python_path.exists():
+            return str(python_path)
+    except:
+        pass
+    
+    # Auto-detect virtual environment (.venv is Poetry/modern style)
+    from .installer import find_venv_python
+    for venv_name in ('.venv', 'venv'):
+        candidate = find_venv_python(target_dir / venv_name)
+        if candidate:
             return str(candidate)
     
     # Fallback to system Python
     return sys.executable
 
+# Commands that run an installed script from .claude/
+SCRIPTS = {
+    'update': 'update.py',
+    'check': 'check.py'
+}
+
+def _run_script(script_name, target_dir):
+    """Run an installed .claude script with the project's Python"""
+    script = target_dir / '.claude' / script_name
+    
+    if not script.exists():
+        print("❌ Claude Context Box not initialized in this directory")
+        print("   Run: claude-context init")
+        return 1
+    
+    # Get Python executable from venv info
+    python_exe = get_python_executable(target_dir)
+    
+    # Windows has no real exec, so keep a child process there
+    if os.name == 'nt':
+        result = subprocess.run([python_exe, str(script)], cwd=target_dir)
+        return result.returncode
+    
+    # Nothing left to do after the script runs: replace this process
+    sys.stdout.flush()
+    os.chdir(target_dir)
+    os.execvp(python_exe, [python_exe, str(script)])
+
 def main():
     """Main CLI entry point"""
     parser = argparse.ArgumentParser(
@@ -76,6 +114,7 @@ Quick commands (after init):
                         help='Target directory (default: current)')
     
     args = parser.parse_args()
+    target_dir = Path(args.dir).resolve()
     
     # Handle version
     if args.version or args.command == 'version':
@@ -86,8 +125,8 @@ Quick commands (after init):
     # Handle commands
     if args.command == 'init':
         # Run installer
-        import os
-        os.environ['CLAUDE_HOME'] = str(Path(args.dir).resolve())
+        from .installer import ClaudeContextInstaller
+        os.environ['CLAUDE_HOME'] = str(target_dir)
         if args.force:
             os.environ['CLAUDE_FORCE'] = '1'
         if args.no_venv:
@@ -96,37 +135,8 @@ Quick commands (after init):
         installer = ClaudeContextInstaller()
         return 0 if installer.run() else 1
     
-    elif args.command == 'update':
-        # Run update script
-        target_dir = Path(args.dir).resolve()
-        update_script = target_dir / '.claude' / 'update.py'
-        
-        if not update_script.exists():
-            print("❌ Claude Context Box not initialized in this directory")
-            print("   Run: claude-context init")
-            return 1
-        
-        # Get Python executable from venv info
-        python_exe = get_python_executable(target_dir)
-        
-        result = subprocess.run([python_exe, str(update_script)], cwd=target_dir)
-        return result.returncode
-    
-    elif args.command == 'check':
-        # Run check script
-        target_dir = Path(args.dir).resolve()
-        check_script = target_dir / '.claude' / 'check.py'
-        
-        if not check_script.exists():
-            print("❌ Claude Context Box not initialized in this directory")
-            print("   Run: claude-context init")
-            return 1
-        
-        # Get Python executable from venv info
-        python_exe = get_python_executable(target_dir)
-        
-        result = subprocess.run([python_exe, str(check_script)], cwd=target_dir)
-        return result.returncode
+    elif args.command in SCRIPTS:
+        return _run_script(SCRIPTS[args.command], target_dir)
     
     else:  # help
         parser.print_help()
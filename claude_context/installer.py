@@ -6,19 +6,301 @@ Claude Context Box - Main installer module
 import os
 import sys
 import json
-import shutil
 import subprocess
-import tempfile
 import re
-from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
-import urllib.request
-import urllib.error
+
+# Bundled templates/ and scripts/, readable from a directory or a zipped wheel
+try:
+    from importlib.resources import files as _resource_files
+except ImportError:  # Python < 3.9
+    _resource_files = None
+PACKAGE_FILES = _resource_files(__package__) if _resource_files and __package__ else Path(__file__).parent
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    tomllib = None
+
+# Conventional virtual environment directory names
+VENV_DIR_NAMES = ('.venv', 'venv', 'env', '.env')
+
+# Layout of a venv created on this platform
+VENV_BIN_DIR = 'Scripts' if os.name == 'nt' else 'bin'
+VENV_PYTHON = 'python.exe' if os.name == 'nt' else 'python3'
+
+# Entries in the project root that mean Claude Context Box is installed,
+# most likely to be present first
+INSTALL_MARKERS = ('CLAUDE.md', '.claude', 'PROJECT.llm')
+
+# Heading that separates preserved user docs in CLAUDE.md
+USER_DOC_MARKER = '# Previous User Documentation'
+
+# CLAUDE.md structure used when merging an existing file
+_CMD_RE = re.compile(r'```bash\n# When user types exactly:(.+?)```', re.DOTALL)
+_SECTION_HDR_RE = re.compile(r'^##\s+(.+)$', re.MULTILINE)
+_SECTION_BOUNDARY_RE = re.compile(r'^##', re.MULTILINE)
+
+# Sections whose heading contains one of these come from our templates
+_TEMPLATE_SECTION_EMOJIS = ('🚨', '⛔', '📋', '⚡', '🔧', '📍', '🎯', '📊', '🔄')
+
+# Directories never searched for virtual environments
+PRUNE_DIRS = {'node_modules', '.git', 'dist', 'build', '__pycache__'}
+
+# "version" is written by the venv module and virtualenv, "version_info" by uv
+_PYVENV_VERSION_RE = re.compile(r'^version(?:_info)?\s*=\s*(.+)$', re.MULTILINE)
+
+# Fallback pyproject.toml checks when tomllib is unavailable or parsing fails
+_POETRY_RE = re.compile(r'^\[tool\.poetry\]', re.MULTILINE)
+_PYTEST_DEP_RE = re.compile(r'^\s*pytest\s*=', re.MULTILINE)
+
+def _inspect_pyproject(content):
+    """Return (has_poetry, has_pytest) for pyproject.toml content"""
+    # Most pyproject.toml files are not Poetry ones; skip parsing those
+    if 'poetry' not in content:
+        return False, False
+    
+    if tomllib is not None:
+        try:
+            poetry = tomllib.loads(content).get('tool', {}).get('poetry')
+        except tomllib.TOMLDecodeError:
+            pass
+        else:
+            if poetry is None:
+                return False, False
+            dep_tables = [poetry.get('dependencies', {}), poetry.get('dev-dependencies', {})]
+            dep_tables.extend(group.get('dependencies', {}) for group in poetry.get('group', {}).values())
+            return True, any('pytest' in deps for deps in dep_tables)
+    
+    return bool(_POETRY_RE.search(content)), bool(_PYTEST_DEP_RE.search(content))
+
+def _probe_version(venv):
+    """Get venv Python version from pyvenv.cfg, falling back to running python"""
+    # pyvenv.cfg outlives a deleted interpreter, so check the python itself first
+    if not os.path.isfile(venv['python']):
+        return None
+    
+    try:
+        cfg = (venv['path'] / 'pyvenv.cfg').read_text(encoding='utf-8')
+        match = _PYVENV_VERSION_RE.search(cfg)
+        if match:
+            # virtualenv writes e.g. 3.12.1.final.0; keep major.minor.micro
+            version = '.'.join(match.group(1).strip().split('.')[:3])
+            return f"Python {version}"
+    except OSError:
+        pass
+    
+    try:
+        result = subprocess.run(
+            [str(venv['python']), '--version'],
+            capture_output=True,
+            text=True,
+            timeout=10
+        )
+        if result.returncode == 0:
+            return result.stdout.strip()
+    except:
+        pass
+    return None
+
+def _venv_dirs_in(entries):
+    """Paths of the entries named like a venv directory, in VENV_DIR_NAMES order"""
+    found = {entry.name: entry for entry in entries if entry.name in VENV_DIR_NAMES}
+    for name in VENV_DIR_NAMES:
+        entry = found.get(name)
+        if entry is not None and entry.is_dir():
+            yield Path(entry.path)
+
+def find_venv_python(venv_path, require_activate=False):
+    """Find the Python executable in a venv with one directory listing per bin dir"""
+    for bin_name, exe_name in (('bin', 'python3'), ('Scripts', 'python.exe')):
+        try:
+            with os.scandir(venv_path / bin_name) as entries:
+                names = {entry.name for entry in entries}
+        except OSError:
+            continue
+        if exe_name in names and (not require_activate or 'activate' in names):
+            python_exe = venv_path / bin_name / exe_name
+            # The listing includes dangling symlinks; only accept a real interpreter
+            if os.path.isfile(python_exe):
+                return python_exe
+    return None
+
+def _inspect_venv(venv_path):
+    """Describe the venv at venv_path, or None if it is not a working venv"""
+    python_exe = find_venv_python(venv_path, require_activate=True)
+    if not python_exe:
+        return None
+    venv = {
+        'path': venv_path,
+        'python': python_exe,
+        'activate': python_exe.parent / 'activate'
+    }
+    version = _probe_version(venv)
+    if not version:
+        return None
+    venv['version'] = version
+    return venv
+
+def _make_link_or_copy():
+    """Return a copy function that hardlinks src to dst, switching to copying
+    for the rest of the tree once linking fails (e.g. across devices)"""
+    import shutil
+    can_link = True
+    
+    def link_or_copy(src, dst):
+        nonlocal can_link
+        if can_link:
+            try:
+                os.link(src, dst)
+                return dst
+            except OSError:
+                can_link = False
+        return shutil.copy2(src, dst)
+    
+    return link_or_copy
+
+# {{ name }} placeholders in templates
+_VAR_RE = re.compile(r'\{\{\s*(\w+)\s*\}\}')
+
+def _render(template, variables):
+    """Substitute {{ name }} placeholders in a single pass, leaving unknown ones as-is"""
+    return _VAR_RE.sub(lambda m: variables.get(m.group(1), m.group(0)), template)
+
+@lru_cache(maxsize=32)
+def _read_template(template_name):
+    """Read a bundled template, or None if it is missing (templates never change during a run)"""
+    try:
+        return (PACKAGE_FILES / 'templates' / template_name).read_text(encoding='utf-8')
+    except FileNotFoundError:
+        return None
+
+def _write_if_changed(target, data):
+    """Atomically replace target with data unless it already holds exactly that"""
+    try:
+        if target.read_bytes() == data:
+            return False
+    except OSError:
+        pass
+    tmp = target.with_name(target.name + '.tmp')
+    tmp.write_bytes(data)
+    os.replace(tmp, target)
+    return True
+
+def _open_for_write(path, mode=0o644):
+    """Open path for binary writing with the given permissions, so executables
+    need no separate chmod (mode is ignored on Windows)"""
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0)
+    fd = os.open(path, flags, mode)
+    # os.open only applies mode to new files; an existing one keeps its old mode
+    if hasattr(os, 'fchmod'):
+        os.fchmod(fd, mode)
+    return open(fd, 'wb')
+
+def _copy_to(src_path, dst_path, mode=0o644):
+    """Stream file bytes to dst_path without decoding them"""
+    import shutil
+    with src_path.open('rb') as src, _open_for_write(dst_path, mode) as dst:
+        shutil.copyfileobj(src, dst, length=65536)
+
+def _is_same_file_copy(src_path, dst_path):
+    """Quick size+mtime check that dst_path is an unchanged copy of src_path"""
+    try:
+        src_stat = os.stat(src_path)
+        dst_stat = os.stat(dst_path)
+    except (OSError, TypeError):  # TypeError: source is inside a zipped package
+        return False
+    return src_stat.st_size == dst_stat.st_size and src_stat.st_mtime_ns == dst_stat.st_mtime_ns
+
+def _copy_mtime(src_path, dst_path):
+    """Give dst_path the modification time of src_path so _is_same_file_copy can match it"""
+    try:
+        src_stat = os.stat(src_path)
+    except (OSError, TypeError):
+        return
+    os.utime(dst_path, ns=(src_stat.st_atime_ns, src_stat.st_mtime_ns))
+
+def _missing_script_stub(script_name):
+    """Placeholder script installed when a bundled script is missing"""
+    return f'''#!/usr/bin/env python3
+"""
+{script_name} - Claude Context Box Script
+ERROR: This script was not found during installation.
+"""
+import sys
+print("❌ Error: {script_name} not properly installed")
+print("   Please reinstall Claude Context Box")
+sys.exit(1)
+'''
+
+# Fallback CLAUDE.md when the bundled template is missing
+_BASIC_CLAUDE_TEMPLATE = """# Claude Context Box Project
+
+## 🚨 КРИТИЧЕСКИЕ ПРАВИЛА (HIGHEST PRIORITY)
+
+1. Priorities: Stability First → Clean Code → DRY → KISS → SOLID
+2. NEVER modify without reading
+3. ALWAYS test before and after
+4. MUST follow 9-step procedure
+
+## ⚡ КОМАНДЫ
+
+- `u` or `update` → Universal update
+- `c` or `check` → Health check
+- `s` or `structure` → Show structure
+
+## 📋 9-STEP PROCEDURE
+
+1. Read PROJECT.llm
+2. Find target module
+3. Read module CONTEXT.llm
+4. Analyze current code
+5. Create baseline tests
+6. Run baseline tests
+7. Make minimal changes
+8. Test again (STOP if fails)
+9. Update contexts
+
+@.claude/prompt.md
+@.claude/format.md
+
+---
+Claude Context Box v{{ version }} - {{ timestamp }}"""
+
+# Fallback prompt.md when the bundled template is missing
+_EMBEDDED_PROMPT = """# CLAUDE CONTEXT BOX SYSTEM PROMPT
+
+## ROLE AND GOAL
+
+You are a senior developer who:
+1. Priorities: Stability First → Clean Code → DRY → KISS → SOLID
+2. Creates resilient, maintainable systems
+3. Respects existing codebase structure
+4. Minimizes breaking changes
+
+## CRITICAL SAFETY RULES
+
+**Understand Before Modifying**
+- NEVER modify code you haven't read and understood
+- ALWAYS backup before any changes (create *.backup files)
+- ALWAYS test after modifications
+
+**Surgical Fixes Only**
+- Make MINIMUM changes to fix the issue
+- Preserve existing functionality
+- Only refactor with explicit permission
+- Test edge cases after any change
+
+## MANDATORY 9-STEP PROCEDURE
+
+For ANY code modification, follow these steps EXACTLY..."""
 
 class ClaudeContextInstaller:
     """Main installer class"""
     
     def __init__(self):
+        from datetime import datetime
         self.base_url = os.environ.get('CLAUDE_BASE_URL', '')
         self.version = os.environ.get('CLAUDE_VERSION', '0.1.0')
         self.install_dir = Path(os.environ.get('CLAUDE_HOME', os.getcwd()))
@@ -27,10 +309,32 @@ class ClaudeContextInstaller:
         
         # Paths
         self.claude_dir = self.install_dir / '.claude'
+        self.claude_md_path = self.install_dir / 'CLAUDE.md'
+        self.project_llm_path = self.install_dir / 'PROJECT.llm'
+        self.hooks_path = self.install_dir / '.claude-hooks.toml'
+        self.venv_info_path = self.claude_dir / 'venv_info.json'
+        self._marker_paths = tuple(os.path.join(self.install_dir, name) for name in INSTALL_MARKERS)
         self.backup_dir = None
+        self._project_info = None
+        self._pkg_proc = None
+        self._pkg_job = None
+        self._venv_info = None
+        self._executor = None
+        
+        # One timestamp for the whole install keeps generated files consistent
+        self._now = datetime.now()
+        self._now_iso = self._now.isoformat()
         
+    def get_executor(self):
+        """Thread pool shared by every concurrent I/O step of the install"""
+        if self._executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            self._executor = ThreadPoolExecutor(max_workers=8)
+        return self._executor
+    
     def run(self):
         """Main installation process"""
+        import shutil
         print(f"\n🚀 Installing Claude Context Box v{self.version}")
         print(f"   Directory: {self.install_dir}")
         
@@ -44,8 +348,7 @@ class ClaudeContextInstaller:
                     # Remove existing files
                     if self.claude_dir.exists():
                         shutil.rmtree(self.claude_dir)
-                    for file in ['CLAUDE.md', 'PROJECT.llm']:
-                        file_path = self.install_dir / file
+                    for file_path in (self.claude_md_path, self.project_llm_path):
                         if file_path.exists():
                             file_path.unlink()
                 else:
@@ -61,7 +364,7 @@ class ClaudeContextInstaller:
             self.install_core_files()
             
             # Create or update CLAUDE.md
-            if self.force or not (self.install_dir / 'CLAUDE.md').exists():
+            if self.force or not self.claude_md_path.exists():
                 # Force mode or first install: create fresh
                 self.create_claude_md()
             else:
@@ -74,6 +377,10 @@ class ClaudeContextInstaller:
             # Create hooks configuration
             self.create_hooks_config()
             
+            # Wait for any background package installation; the update
+            # below runs with the venv's interpreter and packages
+            self.finish_package_install()
+            
             # Run initial update
             self.run_initial_update()
             
@@ -88,26 +395,32 @@ class ClaudeContextInstaller:
             if self.backup_dir and self.backup_dir.exists():
                 print(f"   Backup available at: {self.backup_dir}")
             return False
+        finally:
+            # An install that failed part way must not leave pip or poetry running
+            self.stop_package_install()
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
     
     def check_existing_installation(self):
         """Check if Claude Context Box is already installed"""
-        markers = [
-            self.claude_dir,
-            self.install_dir / 'CLAUDE.md',
-            self.install_dir / 'PROJECT.llm'
-        ]
-        return any(path.exists() for path in markers)
+        # lstat only, stopping at the first marker found; a directory listing
+        # would read every entry of a possibly large project root
+        return any(os.path.lexists(path) for path in self._marker_paths)
     
     def backup_existing(self):
         """Backup existing installation"""
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        import shutil
+        n = self._now
+        timestamp = f"{n.year:04d}{n.month:02d}{n.day:02d}_{n.hour:02d}{n.minute:02d}{n.second:02d}"
         self.backup_dir = self.install_dir / f'.claude_backup_{timestamp}'
         
         print(f"\n📦 Creating backup at {self.backup_dir}")
+        link_or_copy = _make_link_or_copy()
         
         # Backup .claude directory
         if self.claude_dir.exists():
-            shutil.copytree(self.claude_dir, self.backup_dir / '.claude')
+            shutil.copytree(self.claude_dir, self.backup_dir / '.claude', copy_function=link_or_copy)
         
         # Backup root files
         for file in ['CLAUDE.md', 'PROJECT.llm']:
@@ -115,72 +428,76 @@ class ClaudeContextInstaller:
             if src.exists():
                 dst = self.backup_dir / file
                 dst.parent.mkdir(parents=True, exist_ok=True)
-                shutil.copy2(src, dst)
+                link_or_copy(src, dst)
     
+    def iter_venv_candidates(self, nested=False):
+        """Yield venv-named directories at the project root, or one level down if nested"""
+        try:
+            with os.scandir(self.install_dir) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            return
+        
+        # Only directories that actually exist are probed further
+        if not nested:
+            yield from _venv_dirs_in(entries)
+            return
+        for entry in entries:
+            if entry.name.startswith('.') or entry.name in VENV_DIR_NAMES or entry.name in PRUNE_DIRS:
+                continue
+            if not entry.is_dir(follow_symlinks=False):
+                continue
+            try:
+                with os.scandir(entry.path) as it:
+                    yield from _venv_dirs_in(list(it))
+            except OSError:
+                continue
+
     def find_existing_venvs(self):
-        """Find all existing virtual environments in the project"""
-        venvs = []
-        
-        # Find all activate scripts
-        activate_scripts = []
-        for root, dirs, files in os.walk(self.install_dir):
-            if 'activate' in files:
-                activate_path = Path(root) / 'activate'
-                if activate_path.is_file():
-                    activate_scripts.append(activate_path)
-        
-        for activate_script in activate_scripts:
-            venv_path = activate_script.parent.parent  # bin/activate -> venv/
-            python_exe = venv_path / 'bin' / 'python3'
-            if not python_exe.exists():
-                python_exe = venv_path / 'Scripts' / 'python.exe'
-            
-            if python_exe.exists():
-                # Test if it's a valid Python environment
-                try:
-                    result = subprocess.run(
-                        [str(python_exe), '--version'],
-                        capture_output=True,
-                        text=True,
-                        timeout=10
-                    )
-                    if result.returncode == 0:
-                        venvs.append({
-                            'path': venv_path,
-                            'python': python_exe,
-                            'activate': activate_script,
-                            'version': result.stdout.strip()
-                        })
-                except:
-                    continue
-        
-        return venvs
+        """Find existing virtual environments, looking in subdirectories only
+        when the project root has none"""
+        for nested in (False, True):
+            # Validate every candidate concurrently; map keeps discovery order
+            results = self.get_executor().map(_inspect_venv, self.iter_venv_candidates(nested))
+            venvs = [venv for venv in results if venv is not None]
+            if venvs:
+                return venvs
+        return []
 
     def detect_project_type(self):
-        """Detect project type and dependency management"""
+        """Detect project type and dependency management (computed once per installer)"""
+        if self._project_info is not None:
+            return self._project_info
+        
         project_info = {
             'type': 'standard',
             'has_poetry': False,
             'has_requirements': False,
-            'has_pyproject': False
+            'has_pyproject': False,
+            'has_pytest': False
         }
         
         # Check for Poetry
-        if (self.install_dir / 'pyproject.toml').exists():
+        try:
+            content = (self.install_dir / 'pyproject.toml').read_text()
+        except FileNotFoundError:
+            content = None
+        except:
+            content = ''
+        
+        if content is not None:
             project_info['has_pyproject'] = True
-            try:
-                with open(self.install_dir / 'pyproject.toml', 'r') as f:
-                    content = f.read()
-                    if '[tool.poetry]' in content:
-                        project_info['type'] = 'poetry'
-                        project_info['has_poetry'] = True
-            except:
-                pass
+            has_poetry, has_pytest = _inspect_pyproject(content)
+            if has_poetry:
+                project_info['type'] = 'poetry'
+                project_info['has_poetry'] = True
+            project_info['has_pytest'] = has_pytest
         
         # Check for requirements.txt
         if (self.install_dir / 'requirements.txt').exists():
             project_info['has_requirements'] = True
         
+        self._project_info = project_info
         return project_info
 
     def setup_venv(self):
@@ -215,8 +532,7 @@ class ClaudeContextInstaller:
             
             # Create .claude directory and save venv info
             self.claude_dir.mkdir(exist_ok=True)
-            with open(self.claude_dir / 'venv_info.json', 'w') as f:
-                json.dump(venv_info, f, indent=2)
+            self.save_venv_info(venv_info)
             
             rel_path = selected_venv['path'].relative_to(self.install_dir)
             print(f"✅ Using existing virtual environment: {rel_path}")
@@ -244,126 +560,229 @@ class ClaudeContextInstaller:
             if result.returncode == 0:
                 print("  ✅ Virtual environment created")
                 
-                # Find python executable in new venv
-                python_exe = venv_path / 'bin' / 'python3'
-                if not python_exe.exists():
-                    python_exe = venv_path / 'Scripts' / 'python.exe'
+                # We just created it, so the layout is known without probing
+                python_exe = venv_path / VENV_BIN_DIR / VENV_PYTHON
                 
                 # Save venv info
                 venv_info = {
                     'path': str(venv_path),
                     'python': str(python_exe),
-                    'activate': str(venv_path / 'bin' / 'activate'),
+                    'activate': str(venv_path / VENV_BIN_DIR / 'activate'),
                     'type': project_info['type']
                 }
                 
                 self.claude_dir.mkdir(exist_ok=True)
-                with open(self.claude_dir / 'venv_info.json', 'w') as f:
-                    json.dump(venv_info, f, indent=2)
+                self.save_venv_info(venv_info)
                 
                 # Install packages
                 fake_venv = {
                     'path': venv_path,
                     'python': python_exe,
-                    'activate': venv_path / 'bin' / 'activate'
+                    'activate': venv_path / VENV_BIN_DIR / 'activate'
                 }
                 self.install_packages_in_venv(fake_venv, project_info)
                 
             else:
                 print(f"  ⚠️  Failed to create venv: {result.stderr}")
 
+    def save_venv_info(self, venv_info):
+        """Save venv info plus a plain python_path sidecar for fast lookups"""
+        self._venv_info = venv_info
+        _write_if_changed(self.venv_info_path, json.dumps(venv_info, indent=2).encode())
+        _write_if_changed(self.claude_dir / 'python_path', venv_info['python'].encode())
+
     def install_packages_in_venv(self, venv, project_info):
-        """Install packages in the virtual environment"""
+        """Start installing packages in the virtual environment; finish_package_install waits for it"""
         if project_info['has_poetry']:
             print("  🎭 Poetry project detected - using poetry install")
-            # Try to install with poetry
-            try:
-                result = subprocess.run(
-                    ['poetry', 'install'],
-                    cwd=self.install_dir,
-                    capture_output=True,
-                    text=True,
-                    timeout=60
-                )
-                if result.returncode == 0:
-                    print("  ✅ Poetry packages installed")
-                    
-                    # Add pytest if not in pyproject.toml
-                    result = subprocess.run(
-                        ['poetry', 'add', '--group', 'dev', 'pytest'],
-                        cwd=self.install_dir,
-                        capture_output=True,
-                        text=True,
-                        timeout=30
-                    )
-                    if result.returncode == 0:
-                        print("  ✅ Added pytest to dev dependencies")
-                    
-                    return
+            if self._start_package_job('poetry', ['poetry', 'install'], venv, project_info):
+                return
+            print("  ⚠️  Poetry not available or failed")
+        
+        self.install_with_pip(venv, project_info, background=True)
+    
+    def _start_package_job(self, tool, cmd, venv, project_info):
+        """Run an install command in the background so the rest of the install overlaps it"""
+        import tempfile
+        import time
+        stderr_file = tempfile.TemporaryFile()
+        started = time.monotonic()
+        try:
+            self._pkg_proc = subprocess.Popen(
+                cmd,
+                cwd=self.install_dir,
+                stdout=subprocess.DEVNULL,
+                stderr=stderr_file
+            )
+        except OSError:
+            stderr_file.close()
+            return False
+        self._pkg_job = (tool, venv, project_info, stderr_file, started)
+        print(f"  ⏳ {tool} install running in background...")
+        return True
+    
+    def stop_package_install(self):
+        """Kill a background package install that is still running and close its stderr file"""
+        if self._pkg_proc is None:
+            return
+        
+        proc, stderr_file = self._pkg_proc, self._pkg_job[3]
+        self._pkg_proc = self._pkg_job = None
+        if proc.poll() is None:
+            proc.kill()
+        proc.wait()
+        stderr_file.close()
+    
+    def finish_package_install(self):
+        """Wait for a background package install; fall back to pip if poetry failed"""
+        if self._pkg_proc is None:
+            return
+        
+        import time
+        proc, (tool, venv, project_info, stderr_file, started) = self._pkg_proc, self._pkg_job
+        
+        print(f"\n⏳ Waiting for {tool} install...")
+        try:
+            if tool == 'pip':
+                if proc.wait() == 0:
+                    print("  ✅ Packages installed")
                 else:
-                    print(f"  ⚠️  Poetry install failed: {result.stderr}")
-            except:
+                    stderr_file.seek(0)
+                    stderr = stderr_file.read().decode('utf-8', errors='replace')
+                    print(f"  ⚠️  pip install failed: {stderr}")
+                return
+            
+            # Poetry gets 60 seconds from launch, as when it ran in the foreground
+            try:
+                returncode = proc.wait(timeout=max(0, 60 - (time.monotonic() - started)))
+            except subprocess.TimeoutExpired:
+                # stop_package_install kills it below
                 print("  ⚠️  Poetry not available or failed")
+                returncode = None
+            
+            if returncode == 0:
+                print("  ✅ Poetry packages installed")
+                
+                # Add pytest if not in pyproject.toml
+                if not project_info['has_pytest']:
+                    try:
+                        result = subprocess.run(
+                            ['poetry', 'add', '--group', 'dev', 'pytest'],
+                            cwd=self.install_dir,
+                            timeout=30
+                        )
+                        if result.returncode == 0:
+                            print("  ✅ Added pytest to dev dependencies")
+                    except (OSError, subprocess.TimeoutExpired):
+                        pass
+                return
+            
+            if returncode is not None:
+                stderr_file.seek(0)
+                stderr = stderr_file.read().decode('utf-8', errors='replace')
+                print(f"  ⚠️  Poetry install failed: {stderr}")
+        finally:
+            self.stop_package_install()
         
-        # Fallback to pip
-        pip_cmd = str(venv['python']).replace('python3', 'pip3').replace('python.exe', 'pip.exe')
-        if not Path(pip_cmd).exists():
-            pip_cmd = str(venv['path'] / 'bin' / 'pip')
-            if not Path(pip_cmd).exists():
-                pip_cmd = str(venv['path'] / 'Scripts' / 'pip.exe')
+        self.install_with_pip(venv, project_info)
+    
+    def install_with_pip(self, venv, project_info, background=False):
+        """Install packages into the venv with pip"""
+        # Run pip through the venv interpreter so it always matches it
+        pip_cmd = [str(venv['python']), '-m', 'pip']
         
-        if Path(pip_cmd).exists():
+        if Path(venv['python']).exists():
             print("  📦 Installing packages with pip...")
-            subprocess.run([pip_cmd, 'install', '--upgrade', 'pip'], capture_output=True)
-            subprocess.run([pip_cmd, 'install', 'pytest'], capture_output=True)
+            cmd = pip_cmd + ['install', '--disable-pip-version-check', '--no-input',
+                             '--prefer-binary', '--upgrade', 'pip', 'pytest']
             
-            # Install from requirements.txt if exists
+            # Install from requirements.txt in the same pip run if exists
             if project_info['has_requirements']:
                 print("  📋 Installing from requirements.txt...")
-                subprocess.run([pip_cmd, 'install', '-r', 'requirements.txt'], 
-                             capture_output=True, cwd=self.install_dir)
+                cmd += ['-r', 'requirements.txt']
+            
+            if background:
+                if not self._start_package_job('pip', cmd, venv, project_info):
+                    print("  ⚠️  Could not run pip")
+                return
+            
+            try:
+                subprocess.run(cmd, cwd=self.install_dir)
+            except OSError as e:
+                print(f"  ⚠️  Could not run pip: {e}")
+                return
             
             print("  ✅ Packages installed")
         else:
-            print("  ⚠️  Could not find pip executable")
+            print("  ⚠️  Could not find venv Python executable")
     
     def download_template(self, template_name):
         """Load template file from claude_context/templates/"""
-        # Load from claude_context/templates/ directory
-        template_path = Path(__file__).parent / 'templates' / template_name
-        if template_path.exists():
-            return template_path.read_text(encoding='utf-8')
-        
-        print(f"  ⚠️  Template {template_name} not found in claude_context/templates/")
-        return None
+        content = _read_template(template_name)
+        if content is None:
+            print(f"  ⚠️  Template {template_name} not found in claude_context/templates/")
+        return content
+    
+    def prefetch_templates(self, template_names):
+        """Read several templates concurrently to warm the template cache"""
+        list(self.get_executor().map(_read_template, template_names))
     
     def install_core_files(self):
         """Install core script files"""
         print("\n📝 Installing core files...")
         
-        # Create directories
-        self.claude_dir.mkdir(exist_ok=True)
-        (self.claude_dir / 'core').mkdir(exist_ok=True)
-        (self.claude_dir / 'templates').mkdir(exist_ok=True)
+        # Load the templates used later in this install in one batch
+        self.prefetch_templates(['claude.md', 'claude-hooks.toml'])
         
-        # Get prompt.md template
-        prompt_content = self.download_template('prompt.md')
-        if not prompt_content:
-            # Use embedded content from old installer
-            prompt_content = self.get_embedded_prompt()
+        # Create directories (parents=True also creates .claude itself)
+        for directory in ('core', 'templates'):
+            (self.claude_dir / directory).mkdir(parents=True, exist_ok=True)
         
-        with open(self.claude_dir / 'prompt.md', 'w', encoding='utf-8') as f:
-            f.write(prompt_content)
-        print("  ✅ Created prompt.md")
-        
-        # Install Python scripts
+        # Install prompt.md and Python scripts concurrently,
+        # reporting in a stable order
         scripts = self.get_embedded_scripts()
-        for script_name, content in scripts.items():
-            script_path = self.claude_dir / script_name
-            with open(script_path, 'w', encoding='utf-8') as f:
-                f.write(content)
-            script_path.chmod(0o755)
-            print(f"  ✅ Created {script_name}")
+        prompt_install = self.get_executor().submit(self.install_prompt)
+        written = list(self.get_executor().map(self.install_script, scripts, scripts.values()))
+        if not prompt_install.result():
+            print("  ⚠️  Template prompt.md not found in claude_context/templates/")
+        print("  ✅ Created prompt.md")
+        for script_name, was_written in zip(scripts, written):
+            if was_written:
+                print(f"  ✅ Created {script_name}")
+            else:
+                print(f"  ✅ {script_name} is up to date")
+    
+    def install_prompt(self):
+        """Copy the bundled prompt.md byte-for-byte, or write the embedded fallback"""
+        prompt_path = self.claude_dir / 'prompt.md'
+        try:
+            _copy_to(PACKAGE_FILES / 'templates' / 'prompt.md', prompt_path)
+            return True
+        except FileNotFoundError:
+            # Use embedded content from old installer
+            prompt_path.write_bytes(_EMBEDDED_PROMPT.encode('utf-8'))
+            return False
+    
+    def install_script(self, script_name, source_path):
+        """Install a single script into .claude/, returning False if it was already current"""
+        script_path = self.claude_dir / script_name
+        if source_path:
+            if _is_same_file_copy(source_path, script_path):
+                return False
+            _copy_to(source_path, script_path, mode=0o755)
+            _copy_mtime(source_path, script_path)
+        else:
+            # Create minimal stub that shows the error
+            with _open_for_write(script_path, 0o755) as f:
+                f.write(_missing_script_stub(script_name).encode('utf-8'))
+        return True
+    
+    def template_variables(self):
+        """Values for the {{ name }} placeholders in CLAUDE.md templates"""
+        return {
+            'version': self.version,
+            'timestamp': self._now_iso
+        }
     
     def create_claude_md(self):
         """Create CLAUDE.md with ultrathink rules"""
@@ -373,35 +792,29 @@ class ClaudeContextInstaller:
         template = self.download_template('claude.md')
         if not template:
             # Fallback to basic template
-            template = self.get_basic_claude_template()
+            template = _BASIC_CLAUDE_TEMPLATE
         
         # Replace variables
-        content = template.replace('{{ version }}', self.version)
-        content = content.replace('{{ timestamp }}', datetime.now().isoformat())
+        content = _render(template, self.template_variables())
         
         # Write file
-        claude_md_path = self.install_dir / 'CLAUDE.md'
-        with open(claude_md_path, 'w', encoding='utf-8') as f:
-            f.write(content)
+        self.claude_md_path.write_bytes(content.encode('utf-8'))
         print("  ✅ Created CLAUDE.md")
     
     def merge_claude_md(self):
         """Merge existing CLAUDE.md with new template, preserving user customizations"""
         print("\n📝 Updating CLAUDE.md with merge...")
         
-        claude_md_path = self.install_dir / 'CLAUDE.md'
-        
         # Read existing content
-        existing_content = claude_md_path.read_text(encoding='utf-8')
+        existing_content = self.claude_md_path.read_text(encoding='utf-8')
         
         # Get new template
         template = self.download_template('claude.md')
         if not template:
-            template = self.get_basic_claude_template()
+            template = _BASIC_CLAUDE_TEMPLATE
         
         # Replace variables
-        new_content = template.replace('{{ version }}', self.version)
-        new_content = template.replace('{{ timestamp }}', datetime.now().isoformat())
+        new_content = _render(template, self.template_variables())
         
         # Extract user customizations from existing file
         user_customizations = []
@@ -410,40 +823,44 @@ class ClaudeContextInstaller:
         if '.venv/bin/python3' in existing_content or '$(python3 .claude/get_python.py)' in existing_content:
             # User has custom venv setup, preserve it
             # Extract the command mappings section
-            cmd_match = re.search(r'```bash\n# When user types exactly:(.+?)```', existing_content, re.DOTALL)
+            cmd_match = _CMD_RE.search(existing_content)
             if cmd_match:
                 user_commands = cmd_match.group(1)
                 # Replace in new content
-                new_cmd_match = re.search(r'```bash\n# When user types exactly:(.+?)```', new_content, re.DOTALL)
+                new_cmd_match = _CMD_RE.search(new_content)
                 if new_cmd_match:
                     new_content = new_content.replace(new_cmd_match.group(0), f'```bash\n# When user types exactly:{user_commands}```')
                     user_customizations.append("Custom command mappings")
         
         # 2. Check for user-added sections
-        if '# Previous User Documentation' in existing_content:
-            user_doc = existing_content.split('# Previous User Documentation')[1].strip()
-            new_content += f"\n\n---\n\n# Previous User Documentation\n\n{user_doc}"
+        _, marker, user_doc = existing_content.partition(USER_DOC_MARKER)
+        if marker:
+            new_content += f"\n\n---\n\n{USER_DOC_MARKER}\n\n{user_doc.strip()}"
             user_customizations.append("User documentation section")
         
         # 3. Check for additional user sections not in template
-        existing_sections = re.findall(r'^##\s+(.+)$', existing_content, re.MULTILINE)
-        template_sections = re.findall(r'^##\s+(.+)$', template, re.MULTILINE)
+        template_sections = set(_SECTION_HDR_RE.findall(template))
         
-        for section in existing_sections:
-            if section not in template_sections and not any(emoji in section for emoji in ['🚨', '⛔', '📋', '⚡', '🔧', '📍', '🎯', '📊', '🔄']):
+        # One pass over the "##" line starts; each section runs to the next one
+        starts = [m.start() for m in _SECTION_BOUNDARY_RE.finditer(existing_content)]
+        ends = starts[1:] + [len(existing_content)]
+        for start, end in zip(starts, ends):
+            header = _SECTION_HDR_RE.match(existing_content, start)
+            if not header:
+                continue
+            section = header.group(1)
+            if section not in template_sections and not any(emoji in section for emoji in _TEMPLATE_SECTION_EMOJIS):
                 # This is a user-added section
-                section_match = re.search(rf'^##\s+{re.escape(section)}.*?(?=^##|\Z)', existing_content, re.MULTILINE | re.DOTALL)
-                if section_match:
-                    new_content += f"\n\n{section_match.group(0).strip()}\n"
-                    user_customizations.append(f"User section: {section}")
-        
-        # Create backup
-        backup_path = claude_md_path.with_suffix('.md.backup')
-        shutil.copy2(claude_md_path, backup_path)
+                new_content += f"\n\n{existing_content[start:end].strip()}\n"
+                user_customizations.append(f"User section: {section}")
         
-        # Write merged content
-        with open(claude_md_path, 'w', encoding='utf-8') as f:
-            f.write(new_content)
+        # Write merged content next to the original, then move the original
+        # to the backup by rename and put the merged file in its place
+        backup_path = self.claude_md_path.with_suffix('.md.backup')
+        tmp_path = self.claude_md_path.with_suffix('.md.tmp')
+        tmp_path.write_bytes(new_content.encode('utf-8'))
+        os.replace(self.claude_md_path, backup_path)
+        os.replace(tmp_path, self.claude_md_path)
         
         print("  ✅ Updated CLAUDE.md")
         if user_customizations:
@@ -454,15 +871,14 @@ class ClaudeContextInstaller:
     
     def create_initial_project_llm(self):
         """Create initial PROJECT.llm if it doesn't exist"""
-        project_llm_path = self.install_dir / 'PROJECT.llm'
-        if project_llm_path.exists():
+        if self.project_llm_path.exists():
             return
         
         print("\n📝 Creating initial PROJECT.llm...")
         
         content = f"""@project: {self.install_dir.name}
 @version: 0.1.0
-@updated: {datetime.now().isoformat()}
+@updated: {self._now_iso}
 
 @architecture:
 # Modules will be added automatically by update.py
@@ -474,19 +890,16 @@ class ClaudeContextInstaller:
 # Test coverage will be tracked here
 
 @recent_changes:
-- {datetime.now().isoformat()}: Initial Claude Context Box installation
+- {self._now_iso}: Initial Claude Context Box installation
 """
         
-        with open(project_llm_path, 'w', encoding='utf-8') as f:
-            f.write(content)
+        self.project_llm_path.write_bytes(content.encode('utf-8'))
         print("  ✅ Created PROJECT.llm")
     
     def create_hooks_config(self):
         """Create Claude Code hooks configuration"""
-        hooks_path = self.install_dir / '.claude-hooks.toml'
-        
         # Check if already exists
-        if hooks_path.exists():
+        if self.hooks_path.exists():
             print("  ℹ️  .claude-hooks.toml already exists, skipping")
             return
             
@@ -529,8 +942,7 @@ fi
 """
         
         # Write hooks config
-        with open(hooks_path, 'w', encoding='utf-8') as f:
-            f.write(template_content)
+        self.hooks_path.write_bytes(template_content.encode('utf-8'))
         print("  ✅ Created .claude-hooks.toml")
         print("  💡 Edit .claude-hooks.toml to customize automation")
     
@@ -541,32 +953,28 @@ fi
         # Get Python executable from saved venv info
         python_exe = sys.executable  # fallback
         
-        venv_info_file = self.claude_dir / 'venv_info.json'
-        if venv_info_file.exists():
+        # Reuse the venv chosen by setup_venv, otherwise read it back from disk
+        venv_info = self._venv_info
+        if venv_info is None and self.venv_info_path.exists():
             try:
-                with open(venv_info_file, 'r') as f:
-                    venv_info = json.load(f)
-                    python_exe = venv_info['python']
-                    print(f"  🐍 Using Python from: {venv_info['path']}")
+                venv_info = json.loads(self.venv_info_path.read_text())
             except:
                 print("  ⚠️  Could not read venv info, using system Python")
+        if venv_info:
+            python_exe = venv_info['python']
+            print(f"  🐍 Using Python from: {venv_info['path']}")
         
         # Run update.py
         update_script = self.claude_dir / 'update.py'
         if update_script.exists():
-            result = subprocess.run(
-                [python_exe, str(update_script)],
-                cwd=self.install_dir,
-                capture_output=True,
-                text=True
-            )
+            # Stream update output directly instead of buffering it
+            proc = subprocess.Popen([python_exe, str(update_script)], cwd=self.install_dir)
+            returncode = proc.wait()
             
-            if result.returncode == 0:
+            if returncode == 0:
                 print("  ✅ Context updated successfully")
             else:
                 print(f"  ⚠️  Update completed with warnings")
-                if result.stderr:
-                    print(f"     {result.stderr}")
     
     def setup_mcp_if_enabled(self):
         """Setup MCP Memory Service if enabled via environment variable"""
@@ -579,13 +987,10 @@ fi
         
         # Copy mcp_setup.py to .claude directory  
         # Load from claude_context/scripts/ directory
-        mcp_setup_path_src = Path(__file__).parent / 'scripts' / 'mcp_setup.py'
-        if mcp_setup_path_src.exists():
-            mcp_setup_content = mcp_setup_path_src.read_text(encoding='utf-8')
+        mcp_setup_path_src = PACKAGE_FILES / 'scripts' / 'mcp_setup.py'
+        if mcp_setup_path_src.is_file():
             mcp_setup_path = self.claude_dir / 'mcp_setup.py'
-            with open(mcp_setup_path, 'w', encoding='utf-8') as f:
-                f.write(mcp_setup_content)
-            mcp_setup_path.chmod(0o755)
+            _copy_to(mcp_setup_path_src, mcp_setup_path, mode=0o755)
             print("  ✅ Created mcp_setup.py")
             
             # Run MCP setup with auto mode
@@ -631,104 +1036,25 @@ fi
             print("     pip install uv")
             print("     uvx mcp-memory-service")
     
-    def get_basic_claude_template(self):
-        """Get basic CLAUDE.md template if download fails"""
-        return """# Claude Context Box Project
-
-## 🚨 КРИТИЧЕСКИЕ ПРАВИЛА (HIGHEST PRIORITY)
-
-1. Priorities: Stability First → Clean Code → DRY → KISS → SOLID
-2. NEVER modify without reading
-3. ALWAYS test before and after
-4. MUST follow 9-step procedure
-
-## ⚡ КОМАНДЫ
-
-- `u` or `update` → Universal update
-- `c` or `check` → Health check
-- `s` or `structure` → Show structure
-
-## 📋 9-STEP PROCEDURE
-
-1. Read PROJECT.llm
-2. Find target module
-3. Read module CONTEXT.llm
-4. Analyze current code
-5. Create baseline tests
-6. Run baseline tests
-7. Make minimal changes
-8. Test again (STOP if fails)
-9. Update contexts
-
-@.claude/prompt.md
-@.claude/format.md
-
----
-Claude Context Box v{{ version }} - {{ timestamp }}"""
-    
-    def get_embedded_prompt(self):
-        """Get embedded prompt content from templates/"""
-        # Load from claude_context/templates/ directory
-        local_path = Path(__file__).parent / 'templates' / 'prompt.md'
-        if local_path.exists():
-            return local_path.read_text(encoding='utf-8')
-        
-        # Fallback to basic version if template not found
-        return """# CLAUDE CONTEXT BOX SYSTEM PROMPT
-
-## ROLE AND GOAL
-
-You are a senior developer who:
-1. Priorities: Stability First → Clean Code → DRY → KISS → SOLID
-2. Creates resilient, maintainable systems
-3. Respects existing codebase structure
-4. Minimizes breaking changes
-
-## CRITICAL SAFETY RULES
-
-**Understand Before Modifying**
-- NEVER modify code you haven't read and understood
-- ALWAYS backup before any changes (create *.backup files)
-- ALWAYS test after modifications
-
-**Surgical Fixes Only**
-- Make MINIMUM changes to fix the issue
-- Preserve existing functionality
-- Only refactor with explicit permission
-- Test edge cases after any change
-
-## MANDATORY 9-STEP PROCEDURE
-
-For ANY code modification, follow these steps EXACTLY..."""
-    
     def get_embedded_scripts(self):
-        """Get embedded Python scripts from claude_context/scripts/"""
+        """Get embedded Python script locations from claude_context/scripts/"""
         scripts = {}
         
         # Script names to install
         script_names = ['update.py', 'check.py', 'help.py', 'context.py', 
                        'validation.py', 'cleancode.py', 'get_python.py',
-                       'mcp_setup.py', 'mcp_check.py']
+                       'mcp_setup.py', 'mcp_check.py', 'parse_cache.py',
+                       'common.py']
         
         for script_name in script_names:
             # Load from claude_context/scripts/ directory
-            local_path = Path(__file__).parent / 'scripts' / script_name
-            if local_path.exists():
-                scripts[script_name] = local_path.read_text(encoding='utf-8')
+            local_path = PACKAGE_FILES / 'scripts' / script_name
+            if local_path.is_file():
+                scripts[script_name] = local_path
                 print(f"  📄 Loading {script_name} from claude_context/scripts/")
             else:
                 print(f"  ❌ Script {script_name} not found in claude_context/scripts/")
-                # Create minimal stub that shows the error
-                scripts[script_name] = f'''#!/usr/bin/env python3
-"""
-{script_name} - Claude Context Box Script
-ERROR: This script was not found during installation.
-"""
-import sys
-print("❌ Error: {script_name} not properly installed")
-print("   Please reinstall Claude Context Box")
-sys.exit(1)
-'''
+                scripts[script_name] = None
         
         return scripts
 
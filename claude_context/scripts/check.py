@@ -4,16 +4,10 @@ Quick project health check
 """
 
 import os
-import sys
 import subprocess
 from pathlib import Path
 
-def venv_check():
-    """Check if running in virtual environment"""
-    if not hasattr(sys, 'prefix'):
-        return False
-    return os.path.exists(os.path.join(sys.prefix, 'bin', 'activate')) or \
-           os.path.exists(os.path.join(sys.prefix, 'Scripts', 'activate'))
+from common import venv_check
 
 def main():
     """Run quick checks"""
@@ -4,67 +4,104 @@ Dead code cleanup utility
 """
 
 import os
-import sys
 import ast
 from pathlib import Path
 import argparse
 
-def venv_check():
-    """Check if running in virtual environment"""
-    if not hasattr(sys, 'prefix'):
-        return False
-    return os.path.exists(os.path.join(sys.prefix, 'bin', 'activate')) or \
-           os.path.exists(os.path.join(sys.prefix, 'Scripts', 'activate'))
+from common import get_tree, map_files, skip_dir, venv_check
 
-def find_unused_imports(filepath):
+class ModuleFacts(ast.NodeVisitor):
+    """Imports, function definitions and referenced names of a module,
+    collected in one traversal"""
+    
+    def __init__(self):
+        self.imports = set()
+        self.functions = []
+        self.used = set()
+    
+    def visit_Import(self, node):
+        for alias in node.names:
+            self.imports.add(alias.asname or alias.name.partition('.')[0])
+    
+    def visit_ImportFrom(self, node):
+        for alias in node.names:
+            if alias.name != '*':
+                self.imports.add(alias.asname or alias.name)
+    
+    def visit_FunctionDef(self, node):
+        self.functions.append(node.name)
+        self.generic_visit(node)
+    
+    def visit_Name(self, node):
+        self.used.add(node.id)
+    
+    def visit_Attribute(self, node):
+        self.used.add(node.attr)
+        self.generic_visit(node)
+    
+    def visit_Assign(self, node):
+        # Names exported through __all__ count as used
+        if any(isinstance(target, ast.Name) and target.id == '__all__' for target in node.targets):
+            if isinstance(node.value, (ast.List, ast.Tuple)):
+                for elt in node.value.elts:
+                    name = getattr(elt, 'value', getattr(elt, 's', None))
+                    if isinstance(name, str):
+                        self.used.add(name)
+        self.generic_visit(node)
+
+def get_module_facts(filepath):
+    """Parse a file and collect the facts the dead code checks need"""
+    _, tree = get_tree(filepath)
+    facts = ModuleFacts()
+    facts.visit(tree)
+    return facts
+
+def find_unused_imports(filepath, facts=None):
     """Find potentially unused imports in a file"""
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        tree = ast.parse(content)
-        
-        # Get all imports
-        imports = []
-        for node in ast.walk(tree):
-            if isinstance(node, ast.Import):
-                for alias in node.names:
-                    imports.append(alias.name.split('.')[0])
-            elif isinstance(node, ast.ImportFrom):
-                if node.module:
-                    imports.append(node.module.split('.')[0])
-        
-        # Simple check - look for usage in code
-        unused = []
-        for imp in set(imports):
-            if content.count(imp) <= 1:  # Only in import statement
-                unused.append(imp)
-        
-        return unused
+        facts = facts or get_module_facts(filepath)
+        # Imported names that are never referenced
+        return sorted(facts.imports - facts.used)
     except:
         return []
 
-def find_unused_functions(filepath):
+def find_unused_functions(filepath, facts=None):
     """Find potentially unused functions"""
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        tree = ast.parse(content)
-        
-        functions = []
-        for node in ast.walk(tree):
-            if isinstance(node, ast.FunctionDef):
-                if not node.name.startswith('_'):
-                    # Count occurrences
-                    count = content.count(node.name)
-                    if count <= 1:  # Only definition
-                        functions.append(node.name)
-        
-        return functions
+        facts = facts or get_module_facts(filepath)
+        return [name for name in facts.functions
+                if not name.startswith('_') and name not in facts.used]
     except:
         return []
 
+def iter_py(top='.', _top_level=True):
+    """Walk the project once, yielding DirEntry objects for Python files
+    outside excluded directories, skipping unreadable ones as os.walk does"""
+    try:
+        entries = os.scandir(top)
+    except OSError:
+        return
+    subdirs = []
+    with entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if not skip_dir(entry.name, _top_level):
+                    subdirs.append(entry.path)
+            elif entry.name.endswith('.py') and entry.is_file():
+                yield entry
+    for subdir in subdirs:
+        yield from iter_py(subdir, False)
+
+def scan_file(py_file):
+    """Dead code findings for one non-empty file: (unused_imports, unused_functions)"""
+    # Parse once for both checks
+    try:
+        facts = get_module_facts(py_file)
+    except:
+        return [], []
+    
+    return find_unused_imports(py_file, facts), find_unused_functions(py_file, facts)
+
 def scan_project():
     """Scan project for dead code"""
     print("🔍 Scanning for dead code...\\n")
@@ -75,22 +112,22 @@ def scan_project():
         'empty_files': []
     }
     
-    for py_file in Path('.').rglob('*.py'):
-        if any(x in str(py_file) for x in ['venv', '__pycache__', '.claude', 'build', 'dist', '.tox']):
-            continue
-        
-        # Check file size
-        if py_file.stat().st_size == 0:
+    # Empty files are spotted from the walk's stat info, the rest are parsed
+    py_files = []
+    for entry in iter_py():
+        py_file = Path(entry.path)
+        if entry.stat().st_size == 0:
             findings['empty_files'].append(str(py_file))
-            continue
-        
+        else:
+            py_files.append(py_file)
+    
+    # Files are independent, so large projects are analyzed in parallel
+    for py_file, (unused_imports, unused_funcs) in zip(py_files, map_files(scan_file, py_files)):
         # Check imports
-        unused_imports = find_unused_imports(py_file)
         if unused_imports:
             findings['unused_imports'][str(py_file)] = unused_imports
         
         # Check functions
-        unused_funcs = find_unused_functions(py_file)
         if unused_funcs:
             findings['unused_functions'][str(py_file)] = unused_funcs
     
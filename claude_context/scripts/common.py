@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Helpers shared by the .claude scripts
+
+Installed next to them, so each script imports these instead of
+carrying its own copy.
+"""
+
+import os
+import sys
+import re
+import ast
+import subprocess
+import platform
+from pathlib import Path
+
+try:
+    from parse_cache import get_source, get_tree, map_files
+except ImportError:
+    # Running without the shared cache: read and parse on every call
+    def get_source(path):
+        with open(path, 'rb') as f:
+            return f.read()
+    
+    def get_tree(path):
+        source = get_source(path)
+        return source, ast.parse(source)
+    
+    def map_files(func, items):
+        return [func(item) for item in items]
+
+# Directories that never contain project modules
+EXCLUDE_DIRS = {
+    # Virtual environments
+    'venv', '.venv', 'env', 'ENV', '.env',
+    
+    # Python cache
+    '__pycache__', '*.py[cod]',
+    
+    # Distribution/build
+    'build', 'dist', '*.egg-info', '.eggs',
+    
+    # Tool caches
+    '.mypy_cache', '.pytest_cache', '.cache', '.ipynb_checkpoints', '.checkpoints',
+    
+    # Testing and coverage
+    '.tox', '.coverage', 'htmlcov', 'coverage', '.nyc_output',
+    
+    # IDE and system configs
+    '.idea', '.vscode', '.fleet', '.DS_Store',
+    
+    # Version control
+    '.git', '.svn', '.hg',
+    
+    # Package managers
+    'node_modules', 'vendor',
+    
+    # Project specific
+    '.claude', '.next', '.nuxt', 'tmp', 'temp', 'target', '.local'
+}
+
+# Plain directory names, for O(1) pruning during a walk
+_EXCLUDE_NAMES = frozenset(d for d in EXCLUDE_DIRS if '*' not in d)
+
+# Layout of a virtualenv created directly in the project root
+ROOT_EXCLUDE_DIRS = frozenset({'site-packages', 'lib', 'bin', 'Scripts'})
+
+def skip_dir(name, top_level=False):
+    """Whether a project walk prunes the directory called name
+
+    Shared by every walker so they all see the same project: hidden and
+    excluded directories anywhere, plus a root-level virtualenv layout.
+    """
+    return name.startswith('.') or name in _EXCLUDE_NAMES or \
+        (top_level and name in ROOT_EXCLUDE_DIRS)
+
+# Module type by keyword in its path, in order of precedence
+MODULE_TYPES = (('api', 'api'), ('model', 'data'), ('service', 'service'), ('util', 'util'))
+_MODULE_TYPE_RE = re.compile('|'.join(keyword for keyword, _ in MODULE_TYPES))
+
+def classify_module(module_path):
+    """Module type for CONTEXT.llm, from keywords in the module path"""
+    path = module_path.lower()
+    # One regex pass settles the common case of no keyword at all
+    if not _MODULE_TYPE_RE.search(path):
+        return 'module'
+    for keyword, module_type in MODULE_TYPES:
+        if keyword in path:
+            return module_type
+
+def render_interface(classes, functions):
+    """Render the @interface section of CONTEXT.llm from analyzed classes and functions"""
+    lines = ["@interface:"]
+    for cls in classes:
+        lines.append(f"- class {cls['name']}")
+        lines.extend(f"  - {method}()" for method in cls['methods'])
+    lines.extend(f"- {func}()" for func in functions)
+    return '\n'.join(lines)
+
+def replace_interface(content, classes, functions):
+    """CONTEXT.llm content with its @interface section re-rendered
+
+    The section runs up to @behavior, or to the end of the file; content
+    without an @interface section is returned unchanged. Rendering the
+    same analysis twice gives the same text, so unchanged modules are
+    left byte-for-byte alone.
+    """
+    start = content.find('@interface:')
+    if start < 0:
+        return content
+    end = content.find('@behavior:', start)
+    after = '\n\n' + content[end:] if end >= 0 else ''
+    return content[:start] + render_interface(classes, functions) + after
+
+def write_file(path, text):
+    """Write text as utf-8, replacing path atomically
+
+    Binary mode keeps LF line endings on Windows; a failed write removes
+    the temporary file instead of leaving it next to path.
+    """
+    tmp = Path(os.fspath(path) + '.tmp')
+    try:
+        tmp.write_bytes(text.encode('utf-8'))
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+        raise
+
+def package_version(python_exe, distribution):
+    """Version of a distribution installed for python_exe, or None
+
+    Reads the package metadata, so the package itself is never run; a
+    process is only spawned when python_exe is not this interpreter.
+    """
+    if os.path.realpath(python_exe) == os.path.realpath(sys.executable):
+        try:
+            from importlib.metadata import version, PackageNotFoundError
+        except ImportError:
+            # Python 3.7 has no importlib.metadata
+            return None
+        try:
+            return version(distribution)
+        except PackageNotFoundError:
+            return None
+    
+    probe = (
+        "import sys\n"
+        "from importlib.metadata import version\n"
+        f"sys.stdout.write(version({distribution!r}))"
+    )
+    try:
+        result = subprocess.run(
+            [python_exe, '-c', probe],
+            capture_output=True, text=True, timeout=5
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if result.returncode != 0:
+        return None
+    return result.stdout.strip() or None
+
+# Running inside a virtual environment: venv/uv set base_prefix, legacy
+# virtualenv sets real_prefix; either differs from sys.prefix
+IN_VENV = sys.prefix != getattr(sys, 'real_prefix', sys.base_prefix)
+
+# Operating system name, looked up once per process
+SYSTEM = platform.system()
+
+def venv_check():
+    """Check if running in virtual environment"""
+    if IN_VENV:
+        return True
+    return os.path.exists(os.path.join(sys.prefix, 'bin', 'activate')) or \
+           os.path.exists(os.path.join(sys.prefix, 'Scripts', 'activate'))
+
+def analyze_python_file(filepath):
+    """Analyze Python file to extract interface info"""
+    try:
+        content = get_source(filepath)
+        
+        classes = []
+        functions = []
+        
+        # No definitions to report, so don't pay for parsing
+        if b'def ' not in content and b'class ' not in content:
+            return {'classes': classes, 'functions': functions}
+        
+        _, tree = get_tree(filepath)
+        
+        # Only module-level classes and functions form the interface
+        for node in tree.body:
+            if isinstance(node, ast.ClassDef):
+                methods = []
+                for item in node.body:
+                    if isinstance(item, ast.FunctionDef) and not item.name.startswith('_'):
+                        methods.append(item.name)
+                classes.append({
+                    'name': node.name,
+                    'methods': methods
+                })
+            elif isinstance(node, ast.FunctionDef):
+                if not node.name.startswith('_'):
+                    functions.append(node.name)
+        
+        return {'classes': classes, 'functions': functions}
+    except:
+        return {'classes': [], 'functions': []}
+
+def analyze_module(module_path):
+    """Combined interface info of the non-test Python files in a module"""
+    analysis = {'classes': [], 'functions': []}
+    for py_file in Path(module_path).glob('*.py'):
+        if not py_file.name.startswith('test_'):
+            file_analysis = analyze_python_file(py_file)
+            analysis['classes'].extend(file_analysis['classes'])
+            analysis['functions'].extend(file_analysis['functions'])
+    return analysis
+
+def get_python_executable(project_dir=None):
+    """Get the Python executable from venv or system"""
+    # Check if we're in a venv
+    if IN_VENV:
+        return sys.executable
+    
+    # Check for venv in project
+    project_dir = project_dir or Path.cwd()
+    for venv_name in ['venv', '.venv']:
+        venv_path = project_dir / venv_name
+        if venv_path.exists():
+            if SYSTEM == "Windows":
+                python_exe = venv_path / "Scripts" / "python.exe"
+            else:
+                python_exe = venv_path / "bin" / "python"
+            
+            if python_exe.exists():
+                return str(python_exe)
+    
+    # Fallback to system Python
+    return sys.executable
+
+def claude_config_candidates():
+    """Claude Desktop config file locations for this platform, most likely first"""
+    home = Path.home()
+    if SYSTEM == "Darwin":
+        return [
+            home / "Library" / "Application Support" / "Claude" / "claude_desktop_config.json",
+            home / ".config" / "Claude" / "claude_desktop_config.json"
+        ]
+    if SYSTEM == "Windows":
+        return [
+            Path(os.environ.get("APPDATA", "")) / "Claude" / "claude_desktop_config.json",
+            home / "AppData" / "Roaming" / "Claude" / "claude_desktop_config.json"
+        ]
+    if SYSTEM == "Linux":
+        return [
+            home / ".config" / "Claude" / "claude_desktop_config.json",
+            home / ".local" / "share" / "Claude" / "claude_desktop_config.json"
+        ]
+    return []
@@ -4,78 +4,69 @@ CONTEXT.llm management system
 """
 
 import os
-import sys
 import re
+import json
 from pathlib import Path
-import ast
 import argparse
 import fnmatch
 
-# Configuration - same as update.py
-EXCLUDE_DIRS = {
-    # Virtual environments
-    'venv', '.venv', 'env', 'ENV', '.env',
-    
-    # Python cache
-    '__pycache__', '*.py[cod]',
-    
-    # Distribution/build
-    'build', 'dist', '*.egg-info', '.eggs',
-    
-    # Tool caches
-    '.mypy_cache', '.pytest_cache', '.cache', '.ipynb_checkpoints', '.checkpoints',
-    
-    # Testing and coverage
-    '.tox', '.coverage', 'htmlcov', 'coverage', '.nyc_output',
-    
-    # IDE and system configs
-    '.idea', '.vscode', '.fleet', '.DS_Store',
-    
-    # Version control
-    '.git', '.svn', '.hg',
-    
-    # Package managers
-    'node_modules', 'vendor',
-    
-    # Project specific
-    '.claude', '.next', '.nuxt', 'tmp', 'temp', 'target', '.local'
-}
+from common import (analyze_python_file, analyze_module, classify_module, map_files, render_interface,
+                    replace_interface, skip_dir, venv_check, write_file)
 
-def venv_check():
-    """Check if running in virtual environment"""
-    if not hasattr(sys, 'prefix'):
-        return False
-    return os.path.exists(os.path.join(sys.prefix, 'bin', 'activate')) or \
-           os.path.exists(os.path.join(sys.prefix, 'Scripts', 'activate'))
+def iter_module_dirs(top='.', _top_level=True):
+    """Walk the project once, yielding (root, has_py, has_context) for each
+    directory outside excluded directories
 
-def analyze_python_file(filepath):
-    """Analyze Python file to extract interface info"""
+    Only the facts the callers need are kept from each listing, rather
+    than a list of every file name. Unreadable directories are skipped,
+    as os.walk does.
+    """
+    has_py = has_context = False
+    subdirs = []
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        tree = ast.parse(content)
-        
-        classes = []
-        functions = []
-        
-        for node in ast.walk(tree):
-            if isinstance(node, ast.ClassDef):
-                methods = []
-                for item in node.body:
-                    if isinstance(item, ast.FunctionDef) and not item.name.startswith('_'):
-                        methods.append(item.name)
-                classes.append({
-                    'name': node.name,
-                    'methods': methods
-                })
-            elif isinstance(node, ast.FunctionDef) and node.col_offset == 0:
-                if not node.name.startswith('_'):
-                    functions.append(node.name)
-        
-        return {'classes': classes, 'functions': functions}
-    except:
-        return {'classes': [], 'functions': []}
+        entries = os.scandir(top)
+    except OSError:
+        return
+    with entries:
+        for entry in entries:
+            name = entry.name
+            if entry.is_dir(follow_symlinks=False):
+                if not skip_dir(name, _top_level):
+                    subdirs.append(entry.path)
+            elif name == 'CONTEXT.llm':
+                has_context = True
+            elif not has_py and name.endswith('.py') and entry.is_file():
+                has_py = True
+    yield top, has_py, has_context
+    for subdir in subdirs:
+        yield from iter_module_dirs(subdir, False)
+
+# Module fingerprints from the last update, to skip unchanged modules
+MANIFEST_PATH = Path('.claude/ctx_manifest.json')
+
+def load_manifest():
+    """Load the update manifest, or an empty one if missing or unreadable"""
+    try:
+        return json.loads(MANIFEST_PATH.read_bytes())
+    except (OSError, ValueError):
+        return {}
+
+def save_manifest(manifest):
+    """Persist the update manifest if the project has a .claude directory"""
+    if MANIFEST_PATH.parent.is_dir():
+        write_file(MANIFEST_PATH, json.dumps(manifest, separators=(',', ':')))
+
+def module_fingerprint(module_path):
+    """Newest mtime_ns of a module directory, its Python files and CONTEXT.llm
+
+    The directory's own mtime covers files being added, removed or renamed.
+    """
+    newest = os.stat(module_path).st_mtime_ns
+    with os.scandir(module_path) as entries:
+        for entry in entries:
+            if entry.name.endswith('.py') or entry.name == 'CONTEXT.llm':
+                newest = max(newest, entry.stat().st_mtime_ns)
+    return newest
 
 def generate_context_llm(module_path):
     """Generate CONTEXT.llm for a module"""
@@ -97,161 +88,108 @@ def generate_context_llm(module_path):
         all_functions.extend(analysis['functions'])
     
     # Determine module type
-    if 'api' in module_path.lower():
-        module_type = 'api'
-    elif 'model' in module_path.lower():
-        module_type = 'data'
-    elif 'service' in module_path.lower():
-        module_type = 'service'
-    elif 'util' in module_path.lower():
-        module_type = 'util'
-    else:
-        module_type = 'module'
+    module_type = classify_module(module_path)
     
     # Build content
-    content = f"""@component: {module_name.title().replace('_', '')}
+    return ''.join([
+        f"""@component: {module_name.title().replace('_', '')}
 @type: {module_type}
 @deps: []
 @purpose: [Add module purpose]
 
-@interface:"""
-    
-    # Add classes
-    for cls in all_classes:
-        content += f"\\n- class {cls['name']}"
-        for method in cls['methods']:
-            content += f"\\n  - {method}()"
-    
-    # Add functions
-    for func in all_functions:
-        content += f"\\n- {func}()"
-    
-    content += """
+""",
+        render_interface(all_classes, all_functions),
+        """
 
 @behavior:
 - [Add key behavior]
 - [Add error handling]
 - [Add performance notes]
-"""
+""",
+    ])
+
+def create_contexts():
+    """Create CONTEXT.llm for every module without one
+
+    Returns (created context paths, number of modules that already had one).
+    """
+    created = []
+    skipped = 0
+    pending = []
     
-    return content
+    for root, has_py, has_context in iter_module_dirs():
+        if has_py and root != '.':
+            if has_context:
+                skipped += 1
+                continue
+            
+            pending.append(root)
+    
+    # Modules are independent, so large projects are analyzed in parallel
+    for root, content in zip(pending, map_files(generate_context_llm, pending)):
+        if content:
+            context_path = os.path.join(root, 'CONTEXT.llm')
+            write_file(context_path, content)
+            created.append(context_path)
+    
+    return created, skipped
 
 def init_contexts():
     """Initialize CONTEXT.llm for all modules"""
     print("🔍 Scanning for modules...")
     
-    created = 0
-    skipped = 0
+    created, skipped = create_contexts()
+    for context_path in created:
+        print(f"✅ Created: {context_path}")
     
-    for root, dirs, files in os.walk('.'):
-        # Skip system directories
-        dirs[:] = [d for d in dirs if d not in EXCLUDE_DIRS]
-        
-        # Additional path validation
-        rel_path = os.path.relpath(root)
-        if any(part in EXCLUDE_DIRS for part in Path(root).parts):
-            continue
-            
-        # Skip if path starts with excluded directories
-        if rel_path.startswith((
-            # Virtual environments
-            'venv/', '.venv/', 'env/', 'ENV/', '.env/',
-            # Python internals
-            'site-packages/', 'lib/', 'bin/', 'Scripts/', '__pycache__/',
-            # Build/dist
-            'build/', 'dist/', '.eggs/', '.tox/',
-            # Tool caches
-            '.mypy_cache/', '.pytest_cache/', '.cache/', '.ipynb_checkpoints/',
-            # Coverage
-            'htmlcov/', '.coverage/',
-            # IDE/system
-            '.idea/', '.vscode/', '.fleet/',
-            # Version control
-            '.git/', '.svn/', '.hg/',
-            # Package managers
-            'node_modules/', 'vendor/',
-            # Project specific
-            '.claude/'
-        )):
-            continue
-        
-        if any(f.endswith('.py') for f in files) and root != '.':
-            context_path = os.path.join(root, 'CONTEXT.llm')
-            
-            if os.path.exists(context_path):
-                skipped += 1
+    print(f"\\n📊 Summary: {len(created)} created, {skipped} skipped")
+    if created:
+        print("\\n💡 Next: Review and update the generated CONTEXT.llm files")
+
+def refresh_contexts():
+    """Re-render the interface of each CONTEXT.llm whose module changed
+    since the last update, writing only files whose text differs
+
+    Returns (updated context paths, number of unchanged modules skipped).
+    """
+    updated = []
+    unchanged = 0
+    context_files = []
+    manifest = load_manifest()
+    previous = dict(manifest)
+    
+    for root, has_py, has_context in iter_module_dirs():
+        if has_context:
+            # Nothing in the module changed since the last update
+            if manifest.get(os.path.normpath(root)) == module_fingerprint(root):
+                unchanged += 1
                 continue
-            
-            content = generate_context_llm(root)
-            if content:
-                with open(context_path, 'w') as f:
-                    f.write(content)
-                print(f"✅ Created: {context_path}")
-                created += 1
+            context_files.append(Path(root, 'CONTEXT.llm'))
+    
+    # Re-analyze modules, in parallel for large projects
+    analyses = map_files(analyze_module, [context_file.parent for context_file in context_files])
+    for context_file, analysis in zip(context_files, analyses):
+        content = context_file.read_text(encoding='utf-8')
+        new_content = replace_interface(content, analysis['classes'], analysis['functions'])
+        if new_content != content:
+            write_file(context_file, new_content)
+            updated.append(context_file)
+        
+        manifest[os.path.normpath(context_file.parent)] = module_fingerprint(context_file.parent)
     
-    print(f"\\n📊 Summary: {created} created, {skipped} skipped")
-    if created > 0:
-        print("\\n💡 Next: Review and update the generated CONTEXT.llm files")
+    if manifest != previous:
+        save_manifest(manifest)
+    return updated, unchanged
 
 def update_contexts():
     """Update existing CONTEXT.llm files"""
     print("🔄 Updating CONTEXT.llm files...")
     
-    updated = 0
+    updated, unchanged = refresh_contexts()
+    for context_file in updated:
+        print(f"✅ Updated: {context_file}")
     
-    for context_file in Path('.').rglob('CONTEXT.llm'):
-        module_path = context_file.parent
-        
-        # Skip if in excluded directory
-        rel_path = os.path.relpath(str(module_path))
-        if any(part in EXCLUDE_DIRS for part in module_path.parts):
-            continue
-        if rel_path.startswith((
-            'venv/', '.venv/', 'env/', 'ENV/', '.env/',
-            'site-packages/', 'lib/', 'bin/', 'Scripts/', '__pycache__/',
-            'build/', 'dist/', '.eggs/', '.tox/',
-            '.mypy_cache/', '.pytest_cache/', '.cache/', '.ipynb_checkpoints/',
-            'htmlcov/', '.coverage/',
-            '.idea/', '.vscode/', '.fleet/',
-            '.git/', '.svn/', '.hg/',
-            'node_modules/', 'vendor/',
-            '.claude/'
-        )):
-            continue
-        
-        # Re-analyze module
-        analysis = {'classes': [], 'functions': []}
-        for py_file in module_path.glob('*.py'):
-            if not py_file.name.startswith('test_'):
-                file_analysis = analyze_python_file(py_file)
-                analysis['classes'].extend(file_analysis['classes'])
-                analysis['functions'].extend(file_analysis['functions'])
-        
-        # Read existing content
-        with open(context_file, 'r') as f:
-            content = f.read()
-        
-        # Update interface section
-        new_interface = "\\n@interface:"
-        for cls in analysis['classes']:
-            new_interface += f"\\n- class {cls['name']}"
-            for method in cls['methods']:
-                new_interface += f"\\n  - {method}()"
-        for func in analysis['functions']:
-            new_interface += f"\\n- {func}()"
-        
-        # Replace interface section
-        if '@interface:' in content:
-            before = content.split('@interface:')[0]
-            after = '\\n@behavior:' + content.split('@behavior:')[1] if '@behavior:' in content else ''
-            new_content = before + new_interface + after
-            
-            with open(context_file, 'w') as f:
-                f.write(new_content)
-            print(f"✅ Updated: {context_file}")
-            updated += 1
-    
-    print(f"\\n📊 Updated {updated} CONTEXT.llm files")
+    print(f"\\n📊 Updated {len(updated)} CONTEXT.llm files ({unchanged} unchanged modules skipped)")
 
 def scan_missing():
     """Scan for modules without CONTEXT.llm"""
@@ -259,39 +197,9 @@ def scan_missing():
     
     missing = []
     
-    for root, dirs, files in os.walk('.'):
-        dirs[:] = [d for d in dirs if d not in EXCLUDE_DIRS]
-        
-        # Additional path validation
-        rel_path = os.path.relpath(root)
-        if any(part in EXCLUDE_DIRS for part in Path(root).parts):
-            continue
-            
-        # Skip if path starts with excluded directories
-        if rel_path.startswith((
-            # Virtual environments
-            'venv/', '.venv/', 'env/', 'ENV/', '.env/',
-            # Python internals
-            'site-packages/', 'lib/', 'bin/', 'Scripts/', '__pycache__/',
-            # Build/dist
-            'build/', 'dist/', '.eggs/', '.tox/',
-            # Tool caches
-            '.mypy_cache/', '.pytest_cache/', '.cache/', '.ipynb_checkpoints/',
-            # Coverage
-            'htmlcov/', '.coverage/',
-            # IDE/system
-            '.idea/', '.vscode/', '.fleet/',
-            # Version control
-            '.git/', '.svn/', '.hg/',
-            # Package managers
-            'node_modules/', 'vendor/',
-            # Project specific
-            '.claude/'
-        )):
-            continue
-        
-        if any(f.endswith('.py') for f in files) and root != '.':
-            if not os.path.exists(os.path.join(root, 'CONTEXT.llm')):
+    for root, has_py, has_context in iter_module_dirs():
+        if has_py and root != '.':
+            if not has_context:
                 missing.append(root)
     
     if missing:
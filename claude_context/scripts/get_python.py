@@ -8,40 +8,44 @@ import sys
 import json
 from pathlib import Path
 
+# Same check as common.IN_VENV, inlined: this script runs before every
+# command, and importing common would cost more than the script itself
+IN_VENV = sys.prefix != getattr(sys, 'real_prefix', sys.base_prefix)
+
+# Common venv locations, checked in this order; only this OS's
+# interpreter layout is probed
+VENV_DIRS = ('.venv', 'venv', 'env')
+if os.name == 'nt':
+    VENV_PYTHONS = ('Scripts/python.exe',)
+else:
+    VENV_PYTHONS = ('bin/python3', 'bin/python')
+
 def find_python():
     """Find the correct Python executable"""
     
     # 1. Check if we're already in a venv
-    if hasattr(sys, 'real_prefix') or (hasattr(sys, 'base_prefix') and sys.base_prefix != sys.prefix):
+    if IN_VENV:
         return sys.executable
     
-    # 2. Check venv_info.json
-    venv_info_path = Path('.claude/venv_info.json')
-    if venv_info_path.exists():
-        try:
-            with open(venv_info_path, 'r') as f:
-                info = json.load(f)
-                python_path = Path(info['python'])
-                if python_path.exists():
-                    return str(python_path)
-        except:
-            pass
-    
-    # 3. Check common venv locations
-    venv_paths = [
-        Path('.venv/bin/python3'),
-        Path('.venv/bin/python'),
-        Path('venv/bin/python3'),
-        Path('venv/bin/python'),
-        Path('env/bin/python3'),
-        Path('env/bin/python'),
-        Path('.venv/Scripts/python.exe'),  # Windows
-        Path('venv/Scripts/python.exe'),   # Windows
-    ]
+    # 2. Check venv_info.json, written by the installer; one read and one
+    # stat on a hit
+    try:
+        with open('.claude/venv_info.json', 'r') as f:
+            python_path = json.load(f)['python']
+        if os.path.isfile(python_path):
+            return python_path
+    except (OSError, ValueError, KeyError, TypeError):
+        # Missing, malformed or stale file: fall back to the venv sweep
+        pass
     
-    for venv_path in venv_paths:
-        if venv_path.exists():
-            return str(venv_path.absolute())
+    # 3. Check common venv locations, only inside directories that exist
+    for venv_dir in VENV_DIRS:
+        if not os.path.isdir(venv_dir):
+            continue
+        for exe in VENV_PYTHONS:
+            venv_path = Path(venv_dir, exe)
+            if venv_path.exists():
+                return str(venv_path.absolute())
     
     # 4. Fallback to system python3
     return 'python3'
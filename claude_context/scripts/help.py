@@ -3,20 +3,10 @@
 Claude Context Box Help System
 """
 
-import os
-import sys
+from common import venv_check
 
-def venv_check():
-    """Check if running in virtual environment"""
-    if not hasattr(sys, 'prefix'):
-        return False
-    return os.path.exists(os.path.join(sys.prefix, 'bin', 'activate')) or \
-           os.path.exists(os.path.join(sys.prefix, 'Scripts', 'activate'))
-
-def main():
-    """Display help information"""
-    
-    help_text = """
+# Static, so built once at import
+HELP_TEXT = """
 🎯 Claude Context Box - Quick Commands
 
 📋 BASIC COMMANDS:
@@ -83,8 +73,11 @@ def main():
   - PROJECT.llm - Architecture & dependencies
   - CLAUDE.md - Quick command reference
 """
+
+def main():
+    """Display help information"""
     
-    print(help_text)
+    print(HELP_TEXT)
     
     if not venv_check():
         print("\\n⚠️  WARNING: Not in virtual environment!")
@@ -2,52 +2,20 @@
 """Check MCP Memory Service status and configuration"""
 
 import json
-import os
-import platform
-import subprocess
 import sys
 from pathlib import Path
 
+from common import claude_config_candidates, get_python_executable, package_version
 
-def get_python_executable():
-    """Get the Python executable from venv or system"""
-    # Check if we're in a venv
-    if sys.prefix != sys.base_prefix:
-        return sys.executable
-    
-    # Check for venv in project
-    project_dir = Path.cwd()
-    for venv_name in ['venv', '.venv']:
-        venv_path = project_dir / venv_name
-        if venv_path.exists():
-            if platform.system() == "Windows":
-                python_exe = venv_path / "Scripts" / "python.exe"
-            else:
-                python_exe = venv_path / "bin" / "python"
-            
-            if python_exe.exists():
-                return str(python_exe)
-    
-    # Fallback to system Python
-    return sys.executable
 
-
-def check_mcp_installed():
+def check_mcp_installed(python_exe=None):
     """Check if MCP memory service is installed in venv"""
-    python_exe = get_python_executable()
+    python_exe = python_exe or get_python_executable()
     
-    try:
-        # Try to run MCP from venv
-        result = subprocess.run(
-            [python_exe, "-m", "mcp_memory_service", "--version"],
-            capture_output=True,
-            text=True,
-            timeout=5
-        )
-        if result.returncode == 0:
-            return True, "venv", result.stdout.strip()
-    except (subprocess.CalledProcessError, FileNotFoundError, subprocess.TimeoutExpired):
-        pass
+    # Read the version from the package metadata of the venv interpreter
+    mcp_version = package_version(python_exe, "mcp-memory-service")
+    if mcp_version:
+        return True, "venv", mcp_version
     
     # Try direct import
     try:
@@ -59,15 +27,16 @@ def check_mcp_installed():
     return False, None, None
 
 
-def check_mcp_database():
+def check_mcp_database(project_dir=None):
     """Check if MCP database exists"""
-    db_path = Path.cwd() / ".local" / "mcp" / "memory.db"
+    mcp_dir = (project_dir or Path.cwd()).joinpath(".local", "mcp")
+    db_path = mcp_dir / "memory.db"
     if db_path.exists():
         size = db_path.stat().st_size
         size_mb = size / (1024 * 1024)
         
         # Check for backup
-        backup_path = Path.cwd() / ".local" / "mcp" / "memory_pre_compact.db"
+        backup_path = mcp_dir / "memory_pre_compact.db"
         has_backup = backup_path.exists()
         
         return True, str(db_path), f"{size_mb:.2f} MB", has_backup
@@ -76,49 +45,38 @@ def check_mcp_database():
 
 def check_claude_config():
     """Check if Claude Desktop is configured for MCP"""
-    system = platform.system()
-    home = Path.home()
-    
-    config_paths = {
-        "Darwin": [
-            home / "Library" / "Application Support" / "Claude" / "claude_desktop_config.json",
-            home / ".config" / "Claude" / "claude_desktop_config.json"
-        ],
-        "Windows": [
-            Path(os.environ.get("APPDATA", "")) / "Claude" / "claude_desktop_config.json",
-            home / "AppData" / "Roaming" / "Claude" / "claude_desktop_config.json"
-        ],
-        "Linux": [
-            home / ".config" / "Claude" / "claude_desktop_config.json",
-            home / ".local" / "share" / "Claude" / "claude_desktop_config.json"
-        ]
-    }
-    
-    for path in config_paths.get(system, []):
-        if path.exists():
-            try:
-                with open(path, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
-                    if "mcpServers" in config and "memory" in config["mcpServers"]:
-                        # Check if using venv Python
-                        command = config["mcpServers"]["memory"].get("command", "")
-                        using_venv = "venv" in command or ".venv" in command
-                        return True, str(path), using_venv
-            except:
-                pass
+    for path in claude_config_candidates():
+        # Opening is the existence check; a missing file costs no extra stat
+        try:
+            with open(path, 'rb') as f:
+                raw = f.read()
+            # Without a "memory" key anywhere there is nothing to parse for
+            if b'"memory"' not in raw:
+                continue
+            config = json.loads(raw)
+            if "mcpServers" in config and "memory" in config["mcpServers"]:
+                # Check if using venv Python
+                command = config["mcpServers"]["memory"].get("command", "")
+                using_venv = "venv" in command or ".venv" in command
+                return True, str(path), using_venv
+        except (OSError, ValueError, TypeError, AttributeError):
+            # Missing, unreadable or not the expected shape: try the next one
+            pass
     
     return False, None, False
 
 
-def check_hooks_config():
+def check_hooks_config(project_dir=None):
     """Check if MCP hooks are configured"""
-    hooks_path = Path.cwd() / ".claude-hooks.toml"
+    hooks_path = (project_dir or Path.cwd()) / ".claude-hooks.toml"
     if hooks_path.exists():
         with open(hooks_path, 'r', encoding='utf-8') as f:
             content = f.read()
             has_mcp_hooks = "MCP Memory Context" in content
-            has_pre_compact = "PreCompact" in content and "memory_pre_compact.db" in content
-            has_post_compact = "PostCompact" in content and "memory_pre_compact.db" in content
+            # Both compact hooks need the snapshot database; look for it once
+            uses_snapshot = "memory_pre_compact.db" in content
+            has_pre_compact = uses_snapshot and "PreCompact" in content
+            has_post_compact = uses_snapshot and "PostCompact" in content
             return True, has_mcp_hooks, has_pre_compact, has_post_compact
     return False, False, False, False
 
@@ -128,15 +86,17 @@ def main():
     print("🧠 MCP Memory Service Status")
     print("=" * 50)
     
+    project_dir = Path.cwd()
+    
     # Check venv
-    python_exe = get_python_executable()
+    python_exe = get_python_executable(project_dir)
     if "venv" in python_exe or ".venv" in python_exe:
         print(f"✅ Using venv Python: {python_exe}")
     else:
         print(f"⚠️  Using system Python: {python_exe}")
     
     # Check installation
-    installed, method, version = check_mcp_installed()
+    installed, method, version = check_mcp_installed(python_exe)
     if installed:
         print(f"✅ MCP installed in {method}")
         if version:
@@ -146,7 +106,7 @@ def main():
         print("   Run: python3 .claude/mcp_setup.py")
     
     # Check database
-    has_db, db_path, db_size, has_backup = check_mcp_database()
+    has_db, db_path, db_size, has_backup = check_mcp_database(project_dir)
     if has_db:
         print(f"✅ Database exists: {db_path}")
         print(f"   Size: {db_size}")
@@ -170,7 +130,7 @@ def main():
         print("   Run: python3 .claude/mcp_setup.py")
     
     # Check hooks
-    has_hooks, has_mcp, has_pre, has_post = check_hooks_config()
+    has_hooks, has_mcp, has_pre, has_post = check_hooks_config(project_dir)
     if has_hooks:
         print("✅ Hooks configuration exists")
         if has_mcp:
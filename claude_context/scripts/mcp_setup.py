@@ -4,70 +4,34 @@
 import json
 import os
 import platform
+import shutil
 import subprocess
 import sys
 from pathlib import Path
 
+from common import SYSTEM, claude_config_candidates, get_python_executable, package_version
+
 
 def find_claude_config():
     """Find Claude Desktop configuration file location"""
-    system = platform.system()
-    home = Path.home()
-    
-    config_paths = {
-        "Darwin": [
-            home / "Library" / "Application Support" / "Claude" / "claude_desktop_config.json",
-            home / ".config" / "Claude" / "claude_desktop_config.json"
-        ],
-        "Windows": [
-            Path(os.environ.get("APPDATA", "")) / "Claude" / "claude_desktop_config.json",
-            home / "AppData" / "Roaming" / "Claude" / "claude_desktop_config.json"
-        ],
-        "Linux": [
-            home / ".config" / "Claude" / "claude_desktop_config.json",
-            home / ".local" / "share" / "Claude" / "claude_desktop_config.json"
-        ]
-    }
-    
-    for path in config_paths.get(system, []):
+    candidates = claude_config_candidates()
+    for path in candidates:
         if path.exists():
             return path
     
-    # Return default path if not found
-    if system == "Darwin":
-        return home / "Library" / "Application Support" / "Claude" / "claude_desktop_config.json"
-    elif system == "Windows":
-        return home / "AppData" / "Roaming" / "Claude" / "claude_desktop_config.json"
+    # Return default path if not found: the per-user location, which is
+    # the last Windows candidate and the first one elsewhere
+    if SYSTEM == "Windows":
+        return candidates[-1]
+    elif candidates:
+        return candidates[0]
     else:
-        return home / ".config" / "Claude" / "claude_desktop_config.json"
-
-
-def get_python_executable():
-    """Get the Python executable from venv or system"""
-    # Check if we're in a venv
-    if sys.prefix != sys.base_prefix:
-        return sys.executable
-    
-    # Check for venv in project
-    project_dir = Path.cwd()
-    for venv_name in ['venv', '.venv']:
-        venv_path = project_dir / venv_name
-        if venv_path.exists():
-            if platform.system() == "Windows":
-                python_exe = venv_path / "Scripts" / "python.exe"
-            else:
-                python_exe = venv_path / "bin" / "python"
-            
-            if python_exe.exists():
-                return str(python_exe)
-    
-    # Fallback to system Python
-    return sys.executable
+        return Path.home() / ".config" / "Claude" / "claude_desktop_config.json"
 
 
 def get_platform_info():
     """Get detailed platform information for debugging"""
-    system = platform.system()
+    system = SYSTEM
     machine = platform.machine()
     python_version = sys.version_info
     
@@ -134,7 +98,11 @@ def setup_compilation_env():
     return env
 
 def install_mcp_memory():
-    """Install MCP memory service with multiple fallback strategies"""
+    """Install MCP memory service with multiple fallback strategies
+    
+    Returns (success, version); version is only known when the service
+    was already installed.
+    """
     print("\n📦 Installing MCP Memory Service...")
     
     python_exe = get_python_executable()
@@ -143,6 +111,13 @@ def install_mcp_memory():
     print(f"  🐍 Python: {python_exe}")
     print(f"  🖥️  Platform: {platform_info['system']} {platform_info['machine']}")
     
+    # Installing from git clones and builds every time, so skip it when
+    # the service is already there
+    installed = package_version(python_exe, "mcp-memory-service")
+    if installed:
+        print(f"  ✅ MCP Memory Service {installed} already installed")
+        return True, installed
+    
     # Strategy 1: Try with pre-built wheels
     if try_install_with_wheels(python_exe):
         try:
@@ -153,7 +128,7 @@ def install_mcp_memory():
             ], check=True, capture_output=True, text=True)
             
             print("  ✅ MCP Memory Service installed successfully!")
-            return True
+            return True, None
         except subprocess.CalledProcessError:
             pass
     
@@ -179,7 +154,7 @@ def install_mcp_memory():
         
         if result.returncode == 0:
             print("  ✅ MCP Memory Service installed successfully!")
-            return True
+            return True, None
         else:
             raise subprocess.CalledProcessError(result.returncode, result.args, result.stderr)
             
@@ -234,7 +209,7 @@ def install_mcp_memory():
                 if line.strip():
                     print(f"    {line.strip()}")
         
-        return False
+        return False, None
 
 
 def configure_claude_desktop(project_path):
@@ -281,15 +256,36 @@ def configure_claude_desktop(project_path):
         }
     }
     
+    # Write config to a temporary file first, so a crash never leaves
+    # Claude Desktop without one. The config may hold secrets, so the
+    # replacement keeps the existing file's permissions (owner-only if new)
+    try:
+        mode = os.stat(config_path).st_mode & 0o777
+    except FileNotFoundError:
+        mode = 0o600
+    data = memoryview(json.dumps(config, indent=2).encode('utf-8'))
+    tmp_path = config_path.with_suffix('.json.tmp')
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0), mode)
+    try:
+        # os.open's mode is masked by the umask and skipped for an existing file
+        if hasattr(os, 'fchmod'):
+            os.fchmod(fd, mode)
+        while data:
+            data = data[os.write(fd, data):]
+        os.fsync(fd)
+    except BaseException:
+        os.close(fd)
+        tmp_path.unlink()
+        raise
+    os.close(fd)
+    
     # Create backup
     if config_path.exists():
         backup_path = config_path.with_suffix('.json.backup')
-        config_path.rename(backup_path)
+        shutil.copy2(config_path, backup_path)
         print(f"  💾 Backup created: {backup_path}")
     
-    # Write config
-    with open(config_path, 'w', encoding='utf-8') as f:
-        json.dump(config, f, indent=2)
+    os.replace(tmp_path, config_path)
     
     print(f"  ✅ Claude Desktop configured to use venv Python")
     
@@ -363,24 +359,19 @@ echo "📝 Consider storing this in memory: /memory-store"
     print("  ✅ MCP hooks added to .claude-hooks.toml")
 
 
-def test_mcp_service():
-    """Test if MCP memory service is working"""
+def test_mcp_service(mcp_version=None):
+    """Test if MCP memory service is working, unless its version is already known"""
     print("\n🧪 Testing MCP Memory Service...")
     
-    python_exe = get_python_executable()
-    
-    try:
-        result = subprocess.run([
-            python_exe, "-m", "mcp_memory_service", "--version"
-        ], capture_output=True, text=True, check=True)
-        
+    if mcp_version is None:
+        mcp_version = package_version(get_python_executable(), "mcp-memory-service")
+    if mcp_version:
         print(f"  ✅ MCP Memory Service is working")
-        print(f"  📌 Version: {result.stdout.strip()}")
+        print(f"  📌 Version: {mcp_version}")
         return True
-        
-    except subprocess.CalledProcessError:
-        print("  ❌ MCP Memory Service test failed")
-        return False
+    
+    print("  ❌ MCP Memory Service test failed")
+    return False
 
 
 def main():
@@ -417,7 +408,8 @@ def main():
         print("🚀 Auto-installing MCP Memory Service (non-interactive mode)")
     
     # Install MCP memory service in venv
-    if not install_mcp_memory():
+    installed, mcp_version = install_mcp_memory()
+    if not installed:
         print("\n❌ MCP installation failed")
         return
     
@@ -428,7 +420,7 @@ def main():
     update_hooks_config(project_path)
     
     # Test the service
-    test_mcp_service()
+    test_mcp_service(mcp_version)
     
     # Print usage instructions
     print("\n" + "=" * 50)
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Shared source and AST cache for the analysis scripts
+
+Several analyzers look at the same file in one run (e.g. cleancode's
+unused-import and unused-function checks); each file is read and parsed
+once per version, keyed by path, mtime and size.
+"""
+
+import os
+import ast
+from functools import lru_cache
+
+# Below this many items a process pool costs more to start than it saves
+PARALLEL_THRESHOLD = 64
+
+
+@lru_cache(maxsize=256)
+def _read(path, mtime_ns, size):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+@lru_cache(maxsize=128)
+def _parse(path, mtime_ns, size):
+    # A plain parse: the optimized AST of 3.13+ folds constant tuples such
+    # as __all__ = ('a', 'b') into ast.Constant, hiding them from analyzers
+    return ast.parse(_read(path, mtime_ns, size), filename=path)
+
+
+def _key(path):
+    path = os.fspath(path)
+    st = os.stat(path)
+    return path, st.st_mtime_ns, st.st_size
+
+
+def get_source(path):
+    """Get the raw bytes of a Python file"""
+    return _read(*_key(path))
+
+
+def get_tree(path):
+    """Get (source bytes, AST) for a Python file"""
+    key = _key(path)
+    return _read(*key), _parse(*key)
+
+
+def map_files(func, items, chunksize=16):
+    """Map func over items, in worker processes when there are enough of them
+
+    func must be a module-level function so it can be sent to the workers.
+    Falls back to running in this process if the pool cannot be started or
+    fails (e.g. func or its results cannot be pickled).
+    """
+    items = list(items)
+    if len(items) < PARALLEL_THRESHOLD or (os.cpu_count() or 1) < 2:
+        return [func(item) for item in items]
+    
+    from concurrent.futures import ProcessPoolExecutor
+    try:
+        with ProcessPoolExecutor() as executor:
+            return list(executor.map(func, items, chunksize=chunksize))
+    except Exception:
+        return [func(item) for item in items]
@@ -15,51 +15,29 @@ The ONLY command you need: 'u'
 import os
 import sys
 import json
+import shutil
 import subprocess
 import ast
 from datetime import datetime
 from pathlib import Path
 import fnmatch
 import platform
+from string import Template
+from functools import lru_cache
 
-# Configuration
-EXCLUDE_DIRS = {
-    # Virtual environments
-    'venv', '.venv', 'env', 'ENV', '.env',
-    
-    # Python cache
-    '__pycache__', '*.py[cod]',
-    
-    # Distribution/build
-    'build', 'dist', '*.egg-info', '.eggs',
-    
-    # Tool caches
-    '.mypy_cache', '.pytest_cache', '.cache', '.ipynb_checkpoints', '.checkpoints',
-    
-    # Testing and coverage
-    '.tox', '.coverage', 'htmlcov', 'coverage', '.nyc_output',
-    
-    # IDE and system configs
-    '.idea', '.vscode', '.fleet', '.DS_Store',
-    
-    # Version control
-    '.git', '.svn', '.hg',
-    
-    # Package managers
-    'node_modules', 'vendor',
-    
-    # Project specific
-    '.claude', '.next', '.nuxt', 'tmp', 'temp', 'target', '.local'
-}
+from common import EXCLUDE_DIRS, IN_VENV, get_tree, skip_dir, write_file
+from context import create_contexts, iter_module_dirs, refresh_contexts
 
+# Configuration
 EXCLUDE_PATTERNS = {
     '*.pyc', '*.pyo', '*.pyd', '.DS_Store', '*.so', '*.dylib',
     '*.dll', '*.class', '*.log', '*.sqlite', '*.sqlite3', '*.db',
     '*.bak', '*.swp', '*.swo', '*~', '.env*', '*.tmp'
 }
 
+@lru_cache(maxsize=1)
 def venv_check():
-    """Check if running in virtual environment"""
+    """Check if running in virtual environment (checked once per process)"""
     # Try to import venv_utils
     try:
         from venv_utils import venv_check as vc
@@ -72,19 +50,8 @@ def venv_check():
     if os.environ.get('VIRTUAL_ENV'):
         return True
     
-    # Fallback: check if sys.prefix is different from sys.base_prefix
-    if hasattr(sys, 'base_prefix'):
-        return sys.prefix != sys.base_prefix
-    
-    # For older Python versions
-    if hasattr(sys, 'real_prefix'):
-        return True
-    
-    # Last resort: check for venv/virtualenv markers
-    if not hasattr(sys, 'prefix'):
-        return False
-    return os.path.exists(os.path.join(sys.prefix, 'bin', 'activate')) or \
-           os.path.exists(os.path.join(sys.prefix, 'Scripts', 'activate'))
+    # Fallback: sys.prefix differs from the base interpreter's
+    return IN_VENV
 
 def log_action(action, status, details=""):
     """Log actions for procedure tracking"""
@@ -103,6 +70,10 @@ def log_action(action, status, details=""):
 
 def get_python_info():
     """Get Python version info"""
+    # python3 on PATH is usually this very interpreter; no need to spawn it
+    python3 = shutil.which('python3')
+    if python3 and os.path.realpath(python3) == os.path.realpath(sys.executable):
+        return platform.python_version()
     try:
         version = subprocess.check_output(
             ['python3', '--version'], 
@@ -139,8 +110,8 @@ def find_modules():
     }
     
     for root, dirs, files in os.walk('.'):
-        # Filter directories
-        dirs[:] = [d for d in dirs if d not in EXCLUDE_DIRS]
+        # Filter directories with the rule ctx and cleancode walk by
+        dirs[:] = [d for d in dirs if not skip_dir(d, root == '.')]
         
         if should_exclude(root):
             continue
@@ -489,8 +460,7 @@ def create_project_llm(modules, dependencies):
     for change in existing_changes[:9]:  # Keep 9 old + 1 new = 10 total
         content += f"\n{change}"
     
-    with open('PROJECT.llm', 'w') as f:
-        f.write(content)
+    write_file('PROJECT.llm', content)
     
     return True
 
@@ -505,7 +475,7 @@ def create_format_md():
     # Count files by type
     file_types = {}
     for root, dirs, files in os.walk('.'):
-        dirs[:] = [d for d in dirs if d not in EXCLUDE_DIRS]
+        dirs[:] = [d for d in dirs if not skip_dir(d, root == '.')]
         if should_exclude(root):
             continue
             
@@ -559,161 +529,23 @@ def create_format_md():
 **Remember**: Always use `python3` and `pip3`, work in venv!
 """
     
-    with open('.claude/format.md', 'w') as f:
-        f.write(content)
+    write_file('.claude/format.md', content)
 
 # =========== UNIVERSAL LOGIC FUNCTIONS ===========
 
-def analyze_python_file(filepath):
-    """Analyze Python file to extract interface info"""
-    try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        tree = ast.parse(content)
-        
-        classes = []
-        functions = []
-        
-        for node in ast.walk(tree):
-            if isinstance(node, ast.ClassDef):
-                methods = []
-                for item in node.body:
-                    if isinstance(item, ast.FunctionDef) and not item.name.startswith('_'):
-                        methods.append(item.name)
-                classes.append({
-                    'name': node.name,
-                    'methods': methods
-                })
-            elif isinstance(node, ast.FunctionDef) and node.col_offset == 0:
-                if not node.name.startswith('_'):
-                    functions.append(node.name)
-        
-        return {'classes': classes, 'functions': functions}
-    except:
-        return {'classes': [], 'functions': []}
-
-def generate_context_llm(module_path):
-    """Generate CONTEXT.llm for a module"""
-    module_name = os.path.basename(module_path)
-    py_files = list(Path(module_path).glob('*.py'))
-    
-    if not py_files:
-        return None
-    
-    # Analyze all Python files
-    all_classes = []
-    all_functions = []
-    
-    for py_file in py_files:
-        if py_file.name.startswith('test_'):
-            continue
-        analysis = analyze_python_file(py_file)
-        all_classes.extend(analysis['classes'])
-        all_functions.extend(analysis['functions'])
-    
-    # Determine module type
-    if 'api' in module_path.lower():
-        module_type = 'api'
-    elif 'model' in module_path.lower():
-        module_type = 'data'
-    elif 'service' in module_path.lower():
-        module_type = 'service'
-    elif 'util' in module_path.lower():
-        module_type = 'util'
-    else:
-        module_type = 'module'
-    
-    # Build content
-    content = f"""@component: {module_name.title().replace('_', '')}
-@type: {module_type}
-@deps: []
-@purpose: [Add module purpose]
-
-@interface:"""
-    
-    # Add classes
-    for cls in all_classes:
-        content += f"\n- class {cls['name']}"
-        for method in cls['methods']:
-            content += f"\n  - {method}()"
-    
-    # Add functions
-    for func in all_functions:
-        content += f"\n- {func}()"
-    
-    content += """
-
-@behavior:
-- [Add key behavior]
-- [Add error handling]
-- [Add performance notes]
-"""
-    
-    return content
-
 def create_missing_contexts():
-    """Automatically create missing CONTEXT.llm files"""
-    created = 0
-    
-    for root, dirs, files in os.walk('.'):
-        # Skip system directories
-        dirs[:] = [d for d in dirs if d not in EXCLUDE_DIRS]
-        
-        if any(f.endswith('.py') for f in files) and root != '.':
-            context_path = os.path.join(root, 'CONTEXT.llm')
-            
-            if os.path.exists(context_path):
-                continue
-            
-            content = generate_context_llm(root)
-            if content:
-                with open(context_path, 'w') as f:
-                    f.write(content)
-                print(f"   ✅ Created: {context_path}")
-                created += 1
+    """Automatically create missing CONTEXT.llm files (same walk as ctx init)"""
+    created, _ = create_contexts()
+    for context_path in created:
+        print(f"   ✅ Created: {context_path}")
     
-    return created
+    return len(created)
 
 def update_existing_contexts():
-    """Update existing CONTEXT.llm files"""
-    updated = 0
-    
-    for context_file in Path('.').rglob('CONTEXT.llm'):
-        module_path = context_file.parent
-        
-        # Re-analyze module
-        analysis = {'classes': [], 'functions': []}
-        for py_file in module_path.glob('*.py'):
-            if not py_file.name.startswith('test_'):
-                file_analysis = analyze_python_file(py_file)
-                analysis['classes'].extend(file_analysis['classes'])
-                analysis['functions'].extend(file_analysis['functions'])
-        
-        # Read existing content
-        with open(context_file, 'r') as f:
-            content = f.read()
-        
-        # Update interface section
-        new_interface = "\n@interface:"
-        for cls in analysis['classes']:
-            new_interface += f"\n- class {cls['name']}"
-            for method in cls['methods']:
-                new_interface += f"\n  - {method}()"
-        for func in analysis['functions']:
-            new_interface += f"\n- {func}()"
-        
-        # Replace interface section
-        if '@interface:' in content:
-            before = content.split('@interface:')[0]
-            after = '\n@behavior:' + content.split('@behavior:')[1] if '@behavior:' in content else ''
-            new_content = before + new_interface + after
-            
-            with open(context_file, 'w') as f:
-                f.write(new_content)
-            updated += 1
-    
-    return updated
+    """Update existing CONTEXT.llm files, skipping modules unchanged since the
+    last update (shares ctx update's manifest)"""
+    updated, _ = refresh_contexts()
+    return len(updated)
 
 def apply_claude_rules():
     """Read CLAUDE.md and apply rules"""
@@ -724,6 +556,47 @@ def apply_claude_rules():
         print("   ⚠️  CLAUDE.md not found")
         return False
 
+# Baseline test file scaffolding, one BASELINE_TEST block per function
+BASELINE_TEST_LIMIT = 5
+
+BASELINE_HEADER = Template('''"""Baseline tests for ${module_name}
+Auto-generated to capture current behavior before modifications
+"""
+
+import pytest
+import sys
+from pathlib import Path
+
+# Add module to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+# Import module components
+try:
+    from ${module_name} import *
+except ImportError:
+    pass
+
+class TestBaseline${class_name}:
+    """Baseline tests to ensure current functionality is preserved"""
+    
+    def test_baseline_imports(self):
+        """Test that module imports work correctly"""
+        assert True
+
+''')
+
+BASELINE_TEST = Template('''    def test_baseline_${test_name}(self):
+        """Test current behavior of ${func_name}"""
+        # TODO: Add actual test implementation
+        assert True
+
+''')
+
+BASELINE_FOOTER = '''def test_module_imports():
+    """Ensure all module imports work"""
+    assert True
+'''
+
 def create_baseline_test_for_module(module_path):
     """Create baseline test for a specific module"""
     module_name = os.path.basename(module_path)
@@ -738,17 +611,20 @@ def create_baseline_test_for_module(module_path):
     if os.path.exists(test_filename):
         return False
     
-    # Analyze module for functions
+    # Analyze module for functions, stopping once there are enough tests
     functions = []
     for py_file in Path(module_path).glob('*.py'):
+        if len(functions) >= BASELINE_TEST_LIMIT:
+            break
         if py_file.name.startswith(('test_', '__')):
             continue
             
         try:
-            with open(py_file, 'r', encoding='utf-8') as f:
-                tree = ast.parse(f.read())
+            _, tree = get_tree(py_file)
             
-            for node in ast.walk(tree):
+            # Module-level functions and class methods; methods are not
+            # listed a second time as plain functions
+            for node in tree.body:
                 if isinstance(node, ast.FunctionDef):
                     if not node.name.startswith('_'):
                         functions.append({
@@ -769,51 +645,23 @@ def create_baseline_test_for_module(module_path):
     
     if not functions:
         return False
+    functions = functions[:BASELINE_TEST_LIMIT]
+    
+    # Generate test content from the prebuilt templates
+    parts = [BASELINE_HEADER.substitute(
+        module_name=module_name,
+        class_name=module_name.title().replace("_", ""),
+    )]
+    parts.extend(
+        BASELINE_TEST.substitute(
+            test_name=func['name'].replace('.', '_').lower(),
+            func_name=func['name'],
+        )
+        for func in functions
+    )
+    parts.append(BASELINE_FOOTER)
     
-    # Generate test content - using list to avoid f-string issues
-    lines = []
-    lines.append(f'"""Baseline tests for {module_name}')
-    lines.append('Auto-generated to capture current behavior before modifications')
-    lines.append('"""')
-    lines.append('')
-    lines.append('import pytest')
-    lines.append('import sys')
-    lines.append('from pathlib import Path')
-    lines.append('')
-    lines.append('# Add module to path')
-    lines.append('sys.path.insert(0, str(Path(__file__).parent))')
-    lines.append('')
-    lines.append('# Import module components')
-    lines.append('try:')
-    lines.append(f'    from {module_name} import *')
-    lines.append('except ImportError:')
-    lines.append('    pass')
-    lines.append('')
-    lines.append(f'class TestBaseline{module_name.title().replace("_", "")}:')
-    lines.append('    """Baseline tests to ensure current functionality is preserved"""')
-    lines.append('    ')
-    lines.append('    def test_baseline_imports(self):')
-    lines.append('        """Test that module imports work correctly"""')
-    lines.append('        assert True')
-    lines.append('')
-    
-    # Add function tests
-    for func in functions[:5]:  # Limit to 5 functions
-        test_name = func['name'].replace('.', '_').lower()
-        lines.append(f'    def test_baseline_{test_name}(self):')
-        lines.append(f'        """Test current behavior of {func["name"]}"""')
-        lines.append('        # TODO: Add actual test implementation')
-        lines.append('        assert True')
-        lines.append('')
-    
-    lines.append('def test_module_imports():')
-    lines.append('    """Ensure all module imports work"""')
-    lines.append('    assert True')
-    
-    content = '\\n'.join(lines)
-    
-    with open(test_filename, 'w') as f:
-        f.write(content)
+    write_file(test_filename, ''.join(parts))
     
     return True
 
@@ -836,8 +684,12 @@ def analyze_project_state():
     
     # Check for modules with outdated contexts (simplified check)
     outdated_contexts = []
-    for context_file in Path('.').rglob('CONTEXT.llm'):
+    for root, has_py, has_context in iter_module_dirs():
+        if not has_context:
+            continue
+        
         # If context is older than the module files, mark as outdated
+        context_file = Path(root, 'CONTEXT.llm')
         context_time = context_file.stat().st_mtime
         module_dir = context_file.parent
         
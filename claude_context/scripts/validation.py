@@ -10,12 +10,7 @@ import json
 from datetime import datetime
 from pathlib import Path
 
-def venv_check():
-    """Check if running in virtual environment"""
-    if not hasattr(sys, 'prefix'):
-        return False
-    return os.path.exists(os.path.join(sys.prefix, 'bin', 'activate')) or \
-           os.path.exists(os.path.join(sys.prefix, 'Scripts', 'activate'))
+from common import venv_check
 
 class ProcedureValidator:
     """Validates that the 9-step procedure is being followed"""
@@ -7,6 +7,7 @@ import os
 import sys
 import json
 from pathlib import Path
+from functools import lru_cache
 
 
 def get_venv_info():
@@ -93,8 +94,9 @@ def is_poetry_project():
     return Path('pyproject.toml').exists() and '[tool.poetry]' in Path('pyproject.toml').read_text()
 
 
+@lru_cache(maxsize=1)
 def venv_check():
-    """Check if running in virtual environment"""
+    """Check if running in virtual environment (checked once per process)"""
     # First check if we have venv info
     venv_info = get_venv_info()
     if venv_info:
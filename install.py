@@ -200,7 +200,9 @@ def install_package(python_exe, config):
     # Clone the repository to a temporary directory
     with tempfile.TemporaryDirectory() as temp_dir:
         print_colored("📥 Cloning repository...", Colors.BLUE)
-        clone_cmd = f"git clone https://github.com/{GITHUB_REPO}.git {temp_dir}"
+        # Latest only needs the tip commit; specific versions may be any ref
+        depth = "--depth 1 " if config['version'] == 'latest' else ""
+        clone_cmd = f"git clone {depth}https://github.com/{GITHUB_REPO}.git {temp_dir}"
         
         if not run_command(clone_cmd, capture=True):
             print_colored("❌ Failed to clone repository", Colors.RED)
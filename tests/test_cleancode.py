@@ -0,0 +1,38 @@
+"""Regression tests for the dead code checks in scripts/cleancode.py"""
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# The scripts are installed flat into .claude/ and import each other by name
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'claude_context' / 'scripts'))
+
+import cleancode
+
+
+class TestUnusedFunctions(unittest.TestCase):
+    """find_unused_functions on small sample modules"""
+
+    def unused_functions(self, source):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'sample.py'
+            path.write_text(source, encoding='utf-8')
+            return cleancode.find_unused_functions(path)
+
+    def test_all_tuple_exports_are_used(self):
+        # Python 3.13's optimized AST folds this tuple into one ast.Constant
+        source = "__all__ = ('exported_fn', 'other')\n\ndef exported_fn(): pass\n\ndef other(): pass\n"
+        self.assertEqual(self.unused_functions(source), [])
+
+    def test_all_list_exports_are_used(self):
+        source = "__all__ = ['exported_fn']\n\ndef exported_fn(): pass\n"
+        self.assertEqual(self.unused_functions(source), [])
+
+    def test_unreferenced_function_is_reported(self):
+        source = "__all__ = ('exported_fn',)\n\ndef exported_fn(): pass\n\ndef orphan(): pass\n"
+        self.assertEqual(self.unused_functions(source), ['orphan'])
+
+
+if __name__ == '__main__':
+    unittest.main()